@@ -45,7 +45,8 @@ class ResultsAnalyzer:
         performance_data = defaultdict(lambda: {'gpu': [], 'cpu': []})
         
         for result in self.results:
-            if result.get('status') != 'completed':
+            # Cache hits didn't run anything, so they say nothing about performance
+            if result.get('status') != 'completed' or result.get('cache_hit'):
                 continue
             
             job_type = result.get('job_type')
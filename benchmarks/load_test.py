@@ -0,0 +1,85 @@
+"""
+Load test - Run scheduler, workers and client in one process
+"""
+import sys
+import os
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_load_test(job_type: str, params: dict, count: int, workers: int, prefer_gpu: bool):
+    """Submit count jobs and wait until every result has come back"""
+    from broker.broker_client import BrokerConfig, create_broker
+    from client.submit_job import JobClient
+    from scheduler.scheduler import JobScheduler
+    from workers.cpu_worker import CPUWorker
+    
+    config = BrokerConfig()
+    scheduler = JobScheduler()
+    threading.Thread(target=scheduler.start, daemon=True).start()
+    
+    for i in range(workers):
+        worker = CPUWorker(worker_id=f'load-test-cpu-{i}')
+        threading.Thread(target=worker.start, daemon=True).start()
+        
+    results = []
+    results_broker = create_broker(config)
+    results_broker.connect()
+    
+    def collect(result_data: dict):
+        results.append(result_data)
+        if len(results) >= count:
+            # Closing here would tear the connection down under the consume loop
+            results_broker.stop_consuming()
+            
+    client = JobClient()
+    start_time = time.time()
+    client.submit_jobs(job_type, [params] * count, prefer_gpu, strict_device=True)
+    try:
+        results_broker.consume(config.result_queue, collect)
+    finally:
+        results_broker.close()
+    elapsed = time.time() - start_time
+    
+    completed = sum(1 for r in results if r.get('status') == 'completed')
+    print(f"\n{'='*60}")
+    print(f"📊 Load test finished ({config.backend} broker)")
+    print(f"   Jobs: {count} ({completed} completed)")
+    print(f"   Workers: {workers}")
+    print(f"   Wall time: {elapsed:.2f}s")
+    print(f"   Throughput: {count / elapsed:.1f} jobs/s")
+    print(f"{'='*60}\n")
+
+
+def main():
+    """Run the load test"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Load-test scheduler and workers on a single box')
+    parser.add_argument('--backend', type=str, default='memory',
+                       choices=['memory', 'redis', 'rabbitmq'],
+                       help='Broker backend to use')
+    parser.add_argument('--job-type', type=str, default='vector_add',
+                       help='Job type to submit')
+    parser.add_argument('--size', type=int, default=100000,
+                       help='Size parameter for the jobs')
+    parser.add_argument('--iterations', type=int, default=10,
+                       help='Iterations per job')
+    parser.add_argument('--count', type=int, default=200,
+                       help='Number of jobs to submit')
+    parser.add_argument('--workers', type=int, default=2,
+                       help='Number of in-process CPU workers')
+                       
+    args = parser.parse_args()
+    
+    # Must be set before any BrokerConfig is created
+    os.environ['BROKER_BACKEND'] = args.backend
+    
+    run_load_test(args.job_type, {'size': args.size, 'iterations': args.iterations},
+                  args.count, args.workers, prefer_gpu=False)
+
+
+if __name__ == "__main__":
+    main()
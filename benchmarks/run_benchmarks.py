@@ -36,15 +36,15 @@ class BenchmarkSuite:
             'cpu_job_id': None
         }
         
-        # Submit GPU job
+        # Submit GPU job; strict so the scheduler never balances it onto the CPU pool
         print("\n🎮 Submitting GPU job...")
-        gpu_job_id = self.client.submit_job(job_type, params, prefer_gpu=True)
+        gpu_job_id = self.client.submit_job(job_type, params, prefer_gpu=True, strict_device=True)
         benchmark_result['gpu_job_id'] = gpu_job_id
         time.sleep(1)
         
         # Submit CPU job
         print("💻 Submitting CPU job...")
-        cpu_job_id = self.client.submit_job(job_type, params, prefer_gpu=False)
+        cpu_job_id = self.client.submit_job(job_type, params, prefer_gpu=False, strict_device=True)
         benchmark_result['cpu_job_id'] = cpu_job_id
         
         self.results['benchmarks'].append(benchmark_result)
@@ -0,0 +1,235 @@
+"""
+Broker Backend Interface - Operations every message broker must provide
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+
+# Added by consume() to messages, when the backend's record_decode_time is set,
+# with the milliseconds taken to turn the delivered body back into a dict
+DECODE_TIME_FIELD = 'decode_ms'
+
+
+class NonRetryableError(Exception):
+    """Raised by a consumer callback when redelivering the message can never succeed"""
+
+
+class RequeueMessage(Exception):
+    """Raised by a consumer callback to put the message back as is, without counting a retry"""
+
+
+class OrderedSettler:
+    """Releases acks/nacks in delivery order when callbacks finish out of order
+    
+    Each delivery registers a sequence number as it is handed to a callback
+    thread; its settle function only runs once every earlier delivery has
+    been settled, so the unacked messages are always the newest ones.
+    """
+    
+    def __init__(self):
+        self._next_sequence = 0
+        self._next_release = 0
+        self._completed = {}
+        self._lock = threading.Lock()
+        
+    def register(self) -> int:
+        """Sequence number for the next delivery (call from the consuming thread)"""
+        with self._lock:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            return sequence
+            
+    def complete(self, sequence: int, settle: Callable[[], None]):
+        """Settle a delivery once all earlier ones have been settled"""
+        with self._lock:
+            self._completed[sequence] = settle
+            while self._next_release in self._completed:
+                self._completed.pop(self._next_release)()
+                self._next_release += 1
+
+
+class BrokerBackend(ABC):
+    """Common interface for RabbitMQ, Redis Streams and in-memory brokers"""
+    
+    # Exceptions that mean the connection is gone and a reconnect may help
+    connection_errors = ()
+    
+    # Set by consumers that report how long each message took to decode
+    record_decode_time = False
+    
+    def _decoded(self, decode: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run decode, adding its duration to the message if record_decode_time is set"""
+        if not self.record_decode_time:
+            return decode()
+        start = time.perf_counter_ns()
+        message = decode()
+        message[DECODE_TIME_FIELD] = (time.perf_counter_ns() - start) / 1e6
+        return message
+    
+    @abstractmethod
+    def connect(self):
+        """Connect to the broker and declare the standard queues"""
+        
+    @abstractmethod
+    def close(self):
+        """Close the connection"""
+        
+    def is_healthy(self) -> bool:
+        """Return True if the connection is usable without reconnecting"""
+        return True
+        
+    @abstractmethod
+    def publish_many(self, jobs: List[Dict[str, Any]], queue_name: str = None,
+                     headers: Dict[str, Any] = None) -> List[bool]:
+        """Publish a batch of messages, returning a per-message confirmation list"""
+        
+    @abstractmethod
+    def publish_delayed(self, job_data: Dict[str, Any], queue_name: str, delay: float,
+                        headers: Dict[str, Any] = None) -> bool:
+        """Publish a message that only becomes visible on queue_name after delay seconds"""
+        
+    def publish_routed(self, jobs: List[Dict[str, Any]]) -> List[bool]:
+        """Publish jobs to the queue of their static route (see BrokerConfig.static_route)"""
+        results = [False] * len(jobs)
+        by_queue = {}
+        for index, job_data in enumerate(jobs):
+            queue = self.config.route_queues[self.config.static_route(job_data)]
+            by_queue.setdefault(queue, []).append(index)
+            
+        for queue, indexes in by_queue.items():
+            acks = self.publish_many([jobs[i] for i in indexes], queue)
+            for index, acked in zip(indexes, acks):
+                results[index] = acked
+        return results
+        
+    @abstractmethod
+    def broadcast(self, message: Dict[str, Any], channel: str) -> bool:
+        """Deliver a message to every current subscriber of a channel
+        
+        Broadcasts are not stored: subscribers that are not connected at the
+        time never see the message.
+        """
+        
+    @abstractmethod
+    def subscribe(self, channel: str, callback: Callable):
+        """Block calling callback with each broadcast on a channel until close()"""
+        
+    def publish_job(self, job_data: Dict[str, Any], queue_name: str = None) -> bool:
+        """Publish a job to the queue"""
+        queue = queue_name or self.config.job_queue
+        acked = self.publish_many([job_data], queue)[0]
+        
+        if acked:
+            print(f"✓ Job published to {queue}: {job_data.get('job_id', 'N/A')}")
+        return acked
+        
+    def publish_result(self, result_data: Dict[str, Any]) -> bool:
+        """Publish job result"""
+        return self.publish_many([result_data], self.config.result_queue)[0]
+        
+    @abstractmethod
+    def consume(self, queue_name: str, callback: Callable, prefetch: int = None, concurrency: int = None,
+                ordered: bool = False):
+        """Block consuming a queue, acking each message after callback returns
+        
+        ``prefetch`` bounds how many unacked messages this consumer holds and
+        ``concurrency`` is the number of threads running callbacks; 0 runs the
+        callback inline on the consuming thread. Both default to the config.
+        With ``ordered``, callbacks still run concurrently but messages are
+        acked (or retried) in the order they were delivered.
+        """
+        
+    @abstractmethod
+    def stop_consuming(self):
+        """Drain a running consume() so it returns without losing messages (thread-safe)
+        
+        No further messages are taken; deliveries still waiting for a callback
+        thread go back to the queue, and consume() returns once every callback
+        already running has finished and its message has been settled.
+        """
+        
+    def settle(self, queue_name: str, delivery_tag, message: Optional[Dict[str, Any]],
+                headers: Optional[Dict[str, Any]], error: Exception = None):
+        """Ack a message whose callback succeeded, retry or dead-letter it otherwise
+        
+        Consumers settle their own deliveries; callers that process a message
+        from get_message settle it here to get the same retry policy.
+        """
+        if error is None:
+            self.ack(queue_name, delivery_tag)
+            return
+        if isinstance(error, RequeueMessage):
+            self.nack(queue_name, delivery_tag, requeue=True)
+            return
+            
+        print(f"✗ Error processing message: {error}")
+        headers = dict(headers or {})
+        retries = int(headers.get('x-retry-count', 0))
+        headers['x-last-error'] = str(error)
+        
+        try:
+            if isinstance(error, NonRetryableError) or retries >= self.config.max_retries:
+                headers.update({
+                    'x-original-queue': queue_name,
+                    'x-dead-lettered-at': datetime.now().isoformat()
+                })
+                published = self.publish_many([message], self.dead_letter_queue(queue_name), headers)[0]
+                print(f"☠️  Message dead-lettered after {retries} retries")
+            else:
+                delay = min(self.config.retry_base_delay * 2 ** retries, self.config.retry_max_delay)
+                headers['x-retry-count'] = retries + 1
+                published = self.publish_delayed(message, queue_name, delay, headers)
+                print(f"↻ Retry {retries + 1}/{self.config.max_retries} in {delay:.1f}s")
+        except Exception as e:
+            print(f"✗ Could not reroute failed message: {e}")
+            published = False
+            
+        if published:
+            self.ack(queue_name, delivery_tag)
+        else:
+            # Never lose the message: fall back to a plain requeue
+            self.nack(queue_name, delivery_tag, requeue=True)
+            
+    def dead_letter_queue(self, queue_name: str) -> str:
+        """Name of the dead-letter queue that collects failures from queue_name"""
+        return f"{queue_name}{self.config.dead_letter_suffix}"
+        
+    @abstractmethod
+    def get_message(self, queue_name: str) -> Optional[Tuple[Any, Dict[str, Any], Dict[str, Any]]]:
+        """Fetch one message without consuming, as (delivery_tag, message, headers)
+        
+        Returns None when the queue is empty. The message must later be acked,
+        nacked or settled like a consumed one.
+        """
+        
+    def peek(self, queue_name: str, limit: int) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Up to limit (message, headers) pairs from the head of a queue, left in place
+        
+        The default fetches them and requeues them newest first, which keeps
+        the order on brokers that requeue at the head. Brokers that requeue at
+        the tail override this.
+        """
+        fetched = []
+        while len(fetched) < limit:
+            delivery = self.get_message(queue_name)
+            if delivery is None:
+                break
+            fetched.append(delivery)
+        for delivery_tag, _, _ in reversed(fetched):
+            self.nack(queue_name, delivery_tag, requeue=True)
+        return [(message, headers) for _, message, headers in fetched]
+        
+    @abstractmethod
+    def ack(self, queue_name: str, delivery_tag):
+        """Acknowledge a delivered message"""
+        
+    @abstractmethod
+    def nack(self, queue_name: str, delivery_tag, requeue: bool = True):
+        """Reject a delivered message, optionally putting it back on the queue"""
+        
+    @abstractmethod
+    def queue_depth(self, queue_name: str) -> int:
+        """Number of messages waiting in a queue"""
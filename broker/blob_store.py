@@ -0,0 +1,78 @@
+"""
+Blob Store - Out-of-band array payloads referenced from job messages by handle
+"""
+import os
+import tempfile
+import uuid
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+
+class BlobStore:
+    """Memory-mapped array store shared by clients and workers
+
+    Arrays are written once as raw files and mapped by readers, so a worker can
+    wrap them in a tensor without copying or deserializing anything. The
+    ``shm`` backend keeps the files in /dev/shm (POSIX shared memory on Linux)
+    for processes on the same host; the ``dir`` backend uses BLOB_STORE_DIR,
+    which can be a volume shared between hosts. Plain files are used rather
+    than multiprocessing.shared_memory because its resource tracker unlinks
+    segments when the creating process exits, before the worker reads them.
+    """
+
+    def __init__(self, backend: str = None, directory: str = None):
+        self.backend = backend or os.getenv('BLOB_STORE', 'shm')
+
+        if directory:
+            self.directory = directory
+        elif self.backend == 'shm' and os.path.isdir('/dev/shm'):
+            self.directory = '/dev/shm/sd-blobs'
+        elif self.backend in ('shm', 'dir'):
+            # No shared memory filesystem (e.g. Windows): use a local directory
+            self.directory = os.getenv('BLOB_STORE_DIR', os.path.join(tempfile.gettempdir(), 'sd-blobs'))
+        else:
+            raise ValueError(f"Unknown blob store backend: {self.backend}")
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, blob_id: str) -> str:
+        """File backing a blob"""
+        if os.sep in blob_id or '/' in blob_id:
+            raise ValueError(f"Invalid blob id: {blob_id}")
+        return os.path.join(self.directory, f"{blob_id}.blob")
+
+    def allocate(self, shape: Tuple[int, ...], dtype: str = 'float32') -> Tuple[Dict[str, Any], np.ndarray]:
+        """Create a blob and return its handle plus a writable mapping of it"""
+        handle = {
+            'blob_id': uuid.uuid4().hex,
+            'shape': [int(dim) for dim in shape],
+            'dtype': np.dtype(dtype).name
+        }
+        array = np.memmap(self._path(handle['blob_id']), dtype=handle['dtype'],
+                          mode='w+', shape=tuple(handle['shape']))
+        return handle, array
+
+    def put(self, array: np.ndarray) -> Dict[str, Any]:
+        """Copy an array into the store and return its handle"""
+        array = np.ascontiguousarray(array)
+        handle, mapped = self.allocate(array.shape, array.dtype)
+        mapped[...] = array
+        mapped.flush()
+        return handle
+
+    def open(self, handle: Dict[str, Any], writable: bool = False) -> np.ndarray:
+        """Map a blob into memory without copying
+
+        Read-only access uses a copy-on-write mapping, so callers get a
+        writable array (as torch.from_numpy expects) without changing the blob.
+        """
+        return np.memmap(self._path(handle['blob_id']), dtype=handle['dtype'],
+                         mode='r+' if writable else 'c', shape=tuple(handle['shape']))
+
+    def delete(self, handle: Dict[str, Any]):
+        """Remove a blob"""
+        try:
+            os.remove(self._path(handle['blob_id']))
+        except FileNotFoundError:
+            pass
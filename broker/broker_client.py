@@ -2,15 +2,41 @@
 Broker Configuration and Connection Management
 """
 import pika
+import functools
 import json
 import os
-from typing import Dict, Any, Callable
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from broker.base import BrokerBackend, NonRetryableError, OrderedSettler, RequeueMessage
+
+# Optional wire-format dependencies
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
 
 
 class BrokerConfig:
-    """Configuration for RabbitMQ connection"""
+    """Configuration for the broker connection"""
     
     def __init__(self):
+        # Backend selection: rabbitmq, redis or memory
+        self.backend = os.getenv('BROKER_BACKEND', 'rabbitmq').lower()
+        
         self.host = os.getenv('RABBITMQ_HOST', 'localhost')
         self.port = int(os.getenv('RABBITMQ_PORT', '5672'))
         self.user = os.getenv('RABBITMQ_USER', 'admin')
@@ -21,15 +47,190 @@ class BrokerConfig:
         self.result_queue = 'job_results'
         self.gpu_queue = 'gpu_worker_queue'
         self.cpu_queue = 'cpu_worker_queue'
+        self.heartbeat_queue = 'worker_heartbeats'
+        self.progress_queue = 'job_progress'
+        
+        # Fanout channel of job cancellations, heard by the scheduler and every worker
+        self.cancel_channel = 'job_cancellations'
+        
+        # 'direct' publishes statically routable jobs straight to a worker queue
+        # (through a headers exchange on RabbitMQ) instead of via the scheduler
+        self.routing_mode = os.getenv('ROUTING_MODE', 'scheduler').lower()
+        self.routing_exchange = 'job_routing'
+        
+        # Worker heartbeats; workers silent for heartbeat_ttl are considered gone
+        self.heartbeat_interval = float(os.getenv('HEARTBEAT_INTERVAL', '5'))
+        self.heartbeat_ttl = float(os.getenv('HEARTBEAT_TTL', str(3 * self.heartbeat_interval)))
+        
+        # Progress events of running jobs expire unread after this many seconds
+        self.progress_ttl = float(os.getenv('PROGRESS_TTL', '60'))
+        
+        # Redis streams have no TTL, so telemetry streams are trimmed to about this many entries
+        self.telemetry_maxlen = int(os.getenv('TELEMETRY_MAXLEN', '10000'))
+        
+        # Job queues are priority queues (0 disables); messages carry job['priority']
+        self.max_priority = int(os.getenv('BROKER_MAX_PRIORITY', '10'))
+        
+        # Publisher confirms
+        self.confirm_window = int(os.getenv('BROKER_CONFIRM_WINDOW', '256'))
+        self.confirm_timeout = float(os.getenv('BROKER_CONFIRM_TIMEOUT', '30'))
+        self.confirm_poll_interval = float(os.getenv('BROKER_CONFIRM_POLL_INTERVAL', '0.005'))
+        
+        # Consumer flow control: unacked messages held and callback threads (0 = inline)
+        self.prefetch = int(os.getenv('BROKER_PREFETCH', '1'))
+        self.concurrency = int(os.getenv('BROKER_CONCURRENCY', '0'))
+        
+        # Failed messages: retried with exponential backoff, then dead-lettered
+        self.max_retries = int(os.getenv('BROKER_MAX_RETRIES', '3'))
+        self.retry_base_delay = float(os.getenv('BROKER_RETRY_BASE_DELAY', '1'))
+        self.retry_max_delay = float(os.getenv('BROKER_RETRY_MAX_DELAY', '60'))
+        self.dead_letter_suffix = '.dlq'
+        
+        # Wire format for outgoing messages (incoming ones are decoded from
+        # their content_type/content_encoding, so mixed producers interoperate)
+        self.codec = os.getenv('BROKER_CODEC', 'json').lower()
+        self.compression = os.getenv('BROKER_COMPRESSION', 'none').lower()
+        self.compress_min_bytes = int(os.getenv('BROKER_COMPRESS_MIN_BYTES', '4096'))
+        
+        # Redis Streams backend
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = int(os.getenv('REDIS_PORT', '6379'))
+        self.redis_db = int(os.getenv('REDIS_DB', '0'))
+        self.redis_password = os.getenv('REDIS_PASSWORD') or None
+        self.redis_group = os.getenv('REDIS_CONSUMER_GROUP', 'sd-workers')
+        self.redis_block_ms = int(os.getenv('REDIS_BLOCK_MS', '1000'))
+        self.redis_claim_idle_ms = int(os.getenv('REDIS_CLAIM_IDLE_MS', '60000'))
+        self.consumer_name = os.getenv('WORKER_ID', f'{socket.gethostname()}-{os.getpid()}')
+        
+    @property
+    def standard_queues(self) -> List[str]:
+        """Queues every backend declares on connect"""
+        return [self.job_queue, self.result_queue, self.gpu_queue, self.cpu_queue, self.heartbeat_queue,
+                self.progress_queue]
+        
+    def queue_arguments(self, queue_name: str) -> Optional[Dict[str, Any]]:
+        """Declaration arguments for a queue (priority support for job queues)"""
+        if self.max_priority > 0 and queue_name in (self.job_queue, self.gpu_queue, self.cpu_queue):
+            return {'x-max-priority': self.max_priority}
+        if queue_name == self.heartbeat_queue:
+            # Heartbeats are only useful while fresh; don't let them pile up
+            return {'x-message-ttl': int(self.heartbeat_ttl * 1000)}
+        if queue_name == self.progress_queue:
+            return {'x-message-ttl': int(self.progress_ttl * 1000)}
+        return None
+        
+    def stream_maxlen(self, queue_name: str) -> Optional[int]:
+        """Approximate length cap of a Redis stream; only telemetry may be trimmed, never jobs"""
+        if queue_name in (self.heartbeat_queue, self.progress_queue):
+            return self.telemetry_maxlen
+        return None
+        
+    @property
+    def route_queues(self) -> Dict[str, str]:
+        """Queue each static route delivers to"""
+        return {'gpu': self.gpu_queue, 'cpu': self.cpu_queue, 'scheduler': self.job_queue}
+        
+    def static_route(self, job_data: Dict[str, Any]) -> str:
+        """Where a job can go without the scheduler: 'gpu', 'cpu' or 'scheduler'
+        
+        Jobs pinned to a device and CPU jobs (which the scheduler never moves)
+        are routable up front; GPU-preferring jobs need dynamic placement.
+        """
+        if self.routing_mode != 'direct' or job_data.get('use_cache'):
+            # Cache lookups happen in the scheduler
+            return 'scheduler'
+        if job_data.get('strict_device'):
+            return 'gpu' if job_data.get('prefer_gpu', True) else 'cpu'
+        if not job_data.get('prefer_gpu', True):
+            return 'cpu'
+        return 'scheduler'
+        
+    def message_priority(self, message: Dict[str, Any]) -> Optional[int]:
+        """Priority of a message clamped to the supported range, or None"""
+        priority = message.get('priority')
+        if priority is None or self.max_priority <= 0:
+            return None
+        return max(0, min(int(priority), self.max_priority))
 
 
-class RabbitMQClient:
+class MessageCodec:
+    """Serializes messages to bytes and back, with optional compression"""
+    
+    JSON = 'application/json'
+    MSGPACK = 'application/x-msgpack'
+    
+    def __init__(self, codec: str = 'json', compression: str = 'none', compress_min_bytes: int = 4096):
+        if codec == 'msgpack' and msgpack is None:
+            print("⚠️  msgpack not installed, falling back to JSON messages")
+            codec = 'json'
+        if compression == 'zstd' and zstandard is None:
+            print("⚠️  zstandard not installed, sending messages uncompressed")
+            compression = 'none'
+        if compression == 'lz4' and lz4_frame is None:
+            print("⚠️  lz4 not installed, sending messages uncompressed")
+            compression = 'none'
+        if codec not in ('json', 'msgpack'):
+            raise ValueError(f"Unknown message codec: {codec}")
+        if compression not in ('none', 'zstd', 'lz4'):
+            raise ValueError(f"Unknown message compression: {compression}")
+            
+        self.content_type = self.MSGPACK if codec == 'msgpack' else self.JSON
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        
+    def encode(self, message: Dict[str, Any]) -> Tuple[bytes, str, Optional[str]]:
+        """Return (body, content_type, content_encoding) for a message"""
+        if self.content_type == self.MSGPACK:
+            body = msgpack.packb(message, use_bin_type=True)
+        else:
+            body = json.dumps(message).encode('utf-8')
+            
+        # Small bodies are not worth the compression overhead
+        if self.compression == 'none' or len(body) < self.compress_min_bytes:
+            return body, self.content_type, None
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor().compress(body), self.content_type, 'zstd'
+        return lz4_frame.compress(body), self.content_type, 'lz4'
+        
+    @classmethod
+    def decode(cls, body: bytes, content_type: str = None, content_encoding: str = None) -> Dict[str, Any]:
+        """Decode a body produced by any codec configuration (or a plain JSON producer)"""
+        if content_encoding == 'zstd':
+            if zstandard is None:
+                raise NonRetryableError("Message is zstd-compressed but zstandard is not installed")
+            body = zstandard.ZstdDecompressor().decompress(body)
+        elif content_encoding == 'lz4':
+            if lz4_frame is None:
+                raise NonRetryableError("Message is lz4-compressed but lz4 is not installed")
+            body = lz4_frame.decompress(body)
+            
+        if content_type == cls.MSGPACK:
+            if msgpack is None:
+                raise NonRetryableError("Message is msgpack-encoded but msgpack is not installed")
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+
+
+def create_codec(config: 'BrokerConfig') -> MessageCodec:
+    """Build the codec for outgoing messages from the config"""
+    return MessageCodec(config.codec, config.compression, config.compress_min_bytes)
+
+
+class RabbitMQClient(BrokerBackend):
     """RabbitMQ client for publishing and consuming messages"""
     
+    connection_errors = (pika.exceptions.AMQPConnectionError, pika.exceptions.AMQPChannelError)
+    
     def __init__(self, config: BrokerConfig = None):
         self.config = config or BrokerConfig()
         self.connection = None
         self.channel = None
+        self._next_delivery_tag = 1
+        self._pending_confirms = {}
+        self._io_thread = None
+        self._draining = False
+        self._declared_queues = set()
+        self.codec = create_codec(self.config)
         
     def connect(self):
         """Establish connection to RabbitMQ"""
@@ -48,71 +249,364 @@ class RabbitMQClient:
         self.connection = pika.BlockingConnection(parameters)
         self.channel = self.connection.channel()
         
+        # Enable publisher confirms on the underlying channel so acks/nacks are
+        # delivered to our callback instead of blocking every basic_publish.
+        self._next_delivery_tag = 1
+        self._pending_confirms = {}
+        self.channel._impl.confirm_delivery(ack_nack_callback=self._on_delivery_confirmation)
+        
         # Declare queues
-        self.channel.queue_declare(queue=self.config.job_queue, durable=True)
-        self.channel.queue_declare(queue=self.config.result_queue, durable=True)
-        self.channel.queue_declare(queue=self.config.gpu_queue, durable=True)
-        self.channel.queue_declare(queue=self.config.cpu_queue, durable=True)
+        self._declared_queues = set()
+        for queue in self.config.standard_queues:
+            self._declare_queue(queue)
+        if self.config.routing_mode == 'direct':
+            self._declare_routing()
         
         print(f"✓ Connected to RabbitMQ at {self.config.host}:{self.config.port}")
         
-    def publish_job(self, job_data: Dict[str, Any], queue_name: str = None):
-        """Publish a job to the queue"""
+    def _declare_queue(self, queue_name: str, arguments: Dict[str, Any] = None):
+        """Declare a durable queue once per connection"""
+        if queue_name not in self._declared_queues:
+            arguments = arguments or self.config.queue_arguments(queue_name)
+            self.channel.queue_declare(queue=queue_name, durable=True, arguments=arguments)
+            self._declared_queues.add(queue_name)
+            
+    def _declare_routing(self):
+        """Declare the headers exchange that routes jobs on their 'route' header"""
+        exchange = self.config.routing_exchange
+        self.channel.exchange_declare(exchange=exchange, exchange_type='headers', durable=True)
+        for route, queue in self.config.route_queues.items():
+            self.channel.queue_bind(queue=queue, exchange=exchange,
+                                    arguments={'x-match': 'all', 'route': route})
+            
+    def is_healthy(self) -> bool:
+        """Check the connection and channel are open and service heartbeats"""
+        if not self.connection or not self.connection.is_open:
+            return False
+        if not self.channel or not self.channel.is_open:
+            return False
+        
+        try:
+            # Surfaces a connection the broker has already dropped
+            self.connection.process_data_events(time_limit=0)
+        except pika.exceptions.AMQPError:
+            return False
+        return True
+        
+    def _on_delivery_confirmation(self, frame):
+        """Record broker acks/nacks for in-flight publishes"""
+        acked = isinstance(frame.method, pika.spec.Basic.Ack)
+        tag = frame.method.delivery_tag
+        
+        if frame.method.multiple:
+            tags = [t for t in self._pending_confirms if t <= tag]
+        else:
+            tags = [tag] if tag in self._pending_confirms else []
+            
+        for t in tags:
+            index, results = self._pending_confirms.pop(t)
+            results[index] = acked
+            
+    def _wait_for_confirms(self, max_outstanding: int, deadline: float):
+        """Pump the connection until at most max_outstanding publishes are unconfirmed"""
+        while len(self._pending_confirms) > max_outstanding:
+            if time.monotonic() >= deadline:
+                # Give up on whatever is still outstanding; results stay False
+                self._pending_confirms.clear()
+                return
+            self.connection.process_data_events(time_limit=self.config.confirm_poll_interval)
+            
+    def _on_connection_thread(self, fn: Callable, *args):
+        """Run fn on the thread that owns the connection and return its result
+        
+        pika connections are not thread-safe; callbacks running on consumer
+        pool threads hand their broker calls to the consuming thread instead.
+        """
+        if self._io_thread is None or self._io_thread == threading.get_ident():
+            return fn(*args)
+        
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+                
+        self.connection.add_callback_threadsafe(run)
+        return future.result()
+        
+    def publish_many(self, jobs: List[Dict[str, Any]], queue_name: str = None,
+                     headers: Dict[str, Any] = None) -> List[bool]:
+        """Publish a batch of messages with publisher confirms
+        
+        Up to ``confirm_window`` messages are kept in flight at once. Returns a
+        list aligned with ``jobs`` where each entry is True if the broker acked
+        the message and False if it was nacked or not confirmed in time.
+        """
+        return self._on_connection_thread(self._publish_many, jobs, queue_name, headers)
+        
+    def publish_routed(self, jobs: List[Dict[str, Any]]) -> List[bool]:
+        """Publish jobs through the routing exchange, tagged with their static route"""
+        if self.config.routing_mode != 'direct':
+            return super().publish_routed(jobs)
+        return self._on_connection_thread(self._publish_many, jobs, None, None, True)
+        
+    def broadcast(self, message: Dict[str, Any], channel: str) -> bool:
+        """Publish a message to the fanout exchange named after the channel"""
+        return self._on_connection_thread(self._broadcast, message, channel)
+        
+    def _broadcast(self, message: Dict[str, Any], channel: str) -> bool:
+        """Broadcast from the connection thread"""
+        if not self.channel:
+            self.connect()
+        self.channel.exchange_declare(exchange=channel, exchange_type='fanout', durable=True)
+        return self._publish_many([message], exchange=channel)[0]
+        
+    def _publish_many(self, jobs: List[Dict[str, Any]], queue_name: str = None,
+                      headers: Dict[str, Any] = None, routed: bool = False,
+                      exchange: str = None) -> List[bool]:
+        """Publish a batch from the connection thread"""
         if not self.channel:
             self.connect()
             
-        queue = queue_name or self.config.job_queue
-        message = json.dumps(job_data)
+        if routed:
+            # The headers exchange picks the queue; bindings are made on connect
+            exchange, queue = self.config.routing_exchange, ''
+        elif exchange:
+            queue = ''
+        else:
+            exchange, queue = '', queue_name or self.config.job_queue
+            self._declare_queue(queue)
+        results = [False] * len(jobs)
+        deadline = time.monotonic() + self.config.confirm_timeout
+        window = max(1, self.config.confirm_window)
         
-        self.channel.basic_publish(
-            exchange='',
-            routing_key=queue,
-            body=message,
-            properties=pika.BasicProperties(
-                delivery_mode=2,  # Make message persistent
-                content_type='application/json'
+        for index, job_data in enumerate(jobs):
+            self._wait_for_confirms(window - 1, deadline)
+            self._pending_confirms[self._next_delivery_tag] = (index, results)
+            self._next_delivery_tag += 1
+            body, content_type, content_encoding = self.codec.encode(job_data)
+            if routed:
+                message_headers = {**(headers or {}), 'route': self.config.static_route(job_data)}
+            else:
+                message_headers = headers
+            self.channel.basic_publish(
+                exchange=exchange,
+                routing_key=queue,
+                body=body,
+                properties=pika.BasicProperties(
+                    delivery_mode=2,  # Make message persistent
+                    content_type=content_type,
+                    content_encoding=content_encoding,
+                    priority=self.config.message_priority(job_data),
+                    headers=message_headers
+                )
             )
-        )
+            
+        self._wait_for_confirms(0, deadline)
         
-        print(f"✓ Job published to {queue}: {job_data.get('job_id', 'N/A')}")
+        failed = results.count(False)
+        if failed:
+            print(f"✗ {failed}/{len(jobs)} messages to {queue or exchange} were not confirmed")
+        return results
         
-    def publish_result(self, result_data: Dict[str, Any]):
-        """Publish job result"""
-        self.publish_job(result_data, self.config.result_queue)
+    def publish_delayed(self, job_data: Dict[str, Any], queue_name: str, delay: float,
+                        headers: Dict[str, Any] = None) -> bool:
+        """Park a message in a TTL queue that dead-letters it back onto queue_name"""
+        return self._on_connection_thread(self._publish_delayed, job_data, queue_name, delay, headers)
         
-    def consume(self, queue_name: str, callback: Callable):
+    def _publish_delayed(self, job_data: Dict[str, Any], queue_name: str, delay: float,
+                         headers: Dict[str, Any] = None) -> bool:
+        """Publish a delayed message from the connection thread"""
+        if not self.channel:
+            self.connect()
+            
+        delay_ms = int(delay * 1000)
+        delay_queue = f"{queue_name}.retry.{delay_ms}"
+        self._declare_queue(delay_queue, arguments={
+            'x-message-ttl': delay_ms,
+            'x-dead-letter-exchange': '',
+            'x-dead-letter-routing-key': queue_name,
+            # Drop the delay queue once it has been unused for a while
+            'x-expires': delay_ms + 300000
+        })
+        return self._publish_many([job_data], delay_queue, headers)[0]
+        
+    def get_message(self, queue_name: str):
+        """Fetch one message with basic_get"""
+        if not self.channel:
+            self.connect()
+            
+        # A dead-letter queue that never received a message may not exist yet
+        self._declare_queue(queue_name)
+        method, properties, body = self.channel.basic_get(queue=queue_name, auto_ack=False)
+        if method is None:
+            return None
+        message = MessageCodec.decode(body, properties.content_type, properties.content_encoding)
+        return method.delivery_tag, message, dict(properties.headers or {})
+        
+    def consume(self, queue_name: str, callback: Callable, prefetch: int = None, concurrency: int = None,
+                ordered: bool = False):
         """Consume messages from a queue"""
         if not self.channel:
             self.connect()
             
+        prefetch = prefetch or self.config.prefetch
+        concurrency = self.config.concurrency if concurrency is None else concurrency
+        pool = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 0 else None
+        settler = OrderedSettler() if ordered and pool else None
+        # Delivery tags handed to the pool and not settled yet (connection thread only)
+        unsettled = set()
+        
+        def on_done(delivery_tag, properties, body, sequence, future):
+            # Runs on a pool thread: hand the ack/nack back to the connection thread.
+            # The body is decoded again so a retry never carries callback mutations.
+            message = MessageCodec.decode(body, properties.content_type, properties.content_encoding)
+            if future.cancelled():
+                error = RequeueMessage("Consumer stopped before the message was processed")
+            else:
+                error = future.exception()
+                
+            def settle():
+                unsettled.discard(delivery_tag)
+                self.settle(queue_name, delivery_tag, message, properties.headers or {}, error)
+                
+            def schedule():
+                try:
+                    self.connection.add_callback_threadsafe(settle)
+                except Exception as e:
+                    print(f"✗ Could not settle message {delivery_tag}: {e}")
+                    
+            if settler:
+                settler.complete(sequence, schedule)
+            else:
+                schedule()
+                
         def on_message(ch, method, properties, body):
+            headers = properties.headers or {}
             try:
-                message = json.loads(body)
-                callback(message)
-                ch.basic_ack(delivery_tag=method.delivery_tag)
+                message = self._decoded(lambda: MessageCodec.decode(
+                    body, properties.content_type, properties.content_encoding))
             except Exception as e:
-                print(f"✗ Error processing message: {e}")
-                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+                raw = {'raw_body': body.decode('utf-8', errors='replace')}
+                settle = functools.partial(self.settle, queue_name, method.delivery_tag, raw, headers,
+                                           NonRetryableError(f"Undecodable message: {e}"))
+                if settler:
+                    settler.complete(settler.register(), settle)
+                else:
+                    settle()
+                return
                 
-        self.channel.basic_qos(prefetch_count=1)
+            if pool is None:
+                try:
+                    callback(message)
+                except Exception as e:
+                    original = MessageCodec.decode(body, properties.content_type, properties.content_encoding)
+                    self.settle(queue_name, method.delivery_tag, original, headers, e)
+                else:
+                    self.settle(queue_name, method.delivery_tag, message, headers)
+                return
+                
+            sequence = settler.register() if settler else None
+            unsettled.add(method.delivery_tag)
+            future = pool.submit(callback, message)
+            future.add_done_callback(functools.partial(on_done, method.delivery_tag, properties, body, sequence))
+            
+        self._io_thread = threading.get_ident()
+        self.channel.basic_qos(prefetch_count=prefetch)
         self.channel.basic_consume(
             queue=queue_name,
             on_message_callback=on_message
         )
         
-        print(f"⏳ Waiting for messages in {queue_name}...")
-        self.channel.start_consuming()
+        print(f"⏳ Waiting for messages in {queue_name} (prefetch={prefetch}, concurrency={concurrency})...")
+        try:
+            if not self._draining:
+                self.channel.start_consuming()
+        finally:
+            if pool:
+                # Deliveries still waiting for a thread are requeued by on_done
+                pool.shutdown(wait=False, cancel_futures=True)
+                # Keep servicing the connection until running callbacks are settled
+                while self._draining and unsettled and self.connection and self.connection.is_open:
+                    self.connection.process_data_events(time_limit=self.config.confirm_poll_interval)
+            self._io_thread = None
+            
+    def stop_consuming(self):
+        """Cancel the consumer from the connection thread and drain consume()"""
+        self._draining = True
+        connection = self.connection
+        if connection is not None and connection.is_open and self._io_thread is not None:
+            # Unstarted deliveries in pika's buffer are nacked by the cancel
+            connection.add_callback_threadsafe(self.channel.stop_consuming)
+                
+    def subscribe(self, channel: str, callback: Callable):
+        """Receive broadcasts through an exclusive queue bound to the channel's exchange"""
+        if not self.channel:
+            self.connect()
+            
+        self.channel.exchange_declare(exchange=channel, exchange_type='fanout', durable=True)
+        queue = self.channel.queue_declare(queue='', exclusive=True, auto_delete=True).method.queue
+        self.channel.queue_bind(queue=queue, exchange=channel)
+        
+        def on_message(ch, method, properties, body):
+            try:
+                callback(MessageCodec.decode(body, properties.content_type, properties.content_encoding))
+            except Exception as e:
+                print(f"✗ Error handling broadcast on {channel}: {e}")
+                
+        self._io_thread = threading.get_ident()
+        self.channel.basic_consume(queue=queue, on_message_callback=on_message, auto_ack=True)
+        try:
+            self.channel.start_consuming()
+        finally:
+            self._io_thread = None
+            
+    def ack(self, queue_name: str, delivery_tag):
+        """Acknowledge a delivered message"""
+        self.channel.basic_ack(delivery_tag=delivery_tag)
+        
+    def nack(self, queue_name: str, delivery_tag, requeue: bool = True):
+        """Reject a delivered message"""
+        self.channel.basic_nack(delivery_tag=delivery_tag, requeue=requeue)
+        
+    def queue_depth(self, queue_name: str) -> int:
+        """Number of ready messages in a queue"""
+        if not self.channel:
+            self.connect()
+        
+        declared = self.channel.queue_declare(queue=queue_name, passive=True)
+        return declared.method.message_count
         
     def close(self):
         """Close connection"""
-        if self.connection:
+        if self.connection and self.connection.is_open:
             self.connection.close()
             print("✓ Connection closed")
+        self.connection = None
+        self.channel = None
+
+
+def create_broker(config: BrokerConfig = None) -> BrokerBackend:
+    """Create the broker client selected by BROKER_BACKEND"""
+    config = config or BrokerConfig()
+    
+    if config.backend == 'rabbitmq':
+        return RabbitMQClient(config)
+    elif config.backend == 'redis':
+        from broker.redis_backend import RedisStreamsClient
+        return RedisStreamsClient(config)
+    elif config.backend == 'memory':
+        from broker.memory_backend import InMemoryBroker
+        return InMemoryBroker(config)
+    else:
+        raise ValueError(f"Unknown broker backend: {config.backend}")
 
 
 if __name__ == "__main__":
     # Test connection
-    client = RabbitMQClient()
+    client = create_broker()
     try:
         client.connect()
         print("✓ Broker connection test successful!")
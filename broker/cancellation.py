@@ -0,0 +1,157 @@
+"""
+Job Cancellation - Stop signals for running jobs and the channel that delivers them
+"""
+import os
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+
+from broker.broker_client import BrokerConfig, create_broker
+
+
+class JobInterrupted(Exception):
+    """A job stopped before finishing; ``status`` is reported in its result"""
+    status = 'interrupted'
+
+
+class JobCancelled(JobInterrupted):
+    """The job was cancelled through the cancellation channel"""
+    status = 'cancelled'
+
+
+class JobTimedOut(JobInterrupted):
+    """The job ran past its ``timeout_s``"""
+    status = 'timed_out'
+
+
+class CancelToken:
+    """Cooperative stop signal for one job, checked between iterations
+
+    The timeout runs from ``start``, which the engine calls when execution
+    begins, so time spent waiting for a slot, a batch or the engine load is
+    not counted (use the job's ``deadline`` to bound time from submission).
+    """
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+        self.deadline = None
+        self.cancelled_at = None
+        self.preempted = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancelled_at is not None
+
+    def start(self):
+        """Start the timeout clock; later calls keep the first deadline"""
+        if self.timeout and self.deadline is None:
+            self.deadline = time.time() + self.timeout
+
+    def cancel(self):
+        """Ask the job to stop; callbacks run once, on the cancelling thread"""
+        with self._lock:
+            if self.cancelled_at is not None:
+                return
+            self.cancelled_at = time.time()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def preempt(self):
+        """Stop the job because its worker is shutting down; it is requeued, not reported"""
+        self.preempted = True
+        self.cancel()
+        
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run callback when the token is cancelled (immediately if it already is)"""
+        with self._lock:
+            if self.cancelled_at is None:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def check(self):
+        """Raise if the job should stop now"""
+        if self.cancelled:
+            raise JobCancelled("Job was cancelled")
+        if self.deadline is not None and time.time() > self.deadline:
+            raise JobTimedOut("Job exceeded its timeout")
+
+    def hard_stop_at(self, grace: float) -> Optional[float]:
+        """Time after which a job still running should be killed, if any"""
+        limits = [t + grace for t in (self.deadline, self.cancelled_at) if t is not None]
+        return min(limits) if limits else None
+
+
+def cancel_message(job_id: str, reason: str = None) -> Dict[str, Any]:
+    """Message broadcast on the cancellation channel"""
+    return {'job_id': job_id, 'reason': reason, 'cancelled_at': time.time()}
+
+
+class CancellationListener:
+    """Follows the cancellation channel on a background connection
+
+    Cancelled job ids are remembered for CANCEL_RETENTION_S, so jobs that are
+    still queued when they are cancelled are skipped once they arrive. Tokens
+    of jobs being executed are registered with ``watch`` and cancelled as
+    soon as their cancellation is heard.
+    """
+
+    def __init__(self, config: BrokerConfig = None):
+        self.config = config or BrokerConfig()
+        self.retention = float(os.getenv('CANCEL_RETENTION_S', '3600'))
+        self.broker = create_broker(self.config)
+        self._cancelled = {}
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start listening in the background"""
+        self._thread = threading.Thread(target=self._run, name='cancellations', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Subscribe, resubscribing after connection failures"""
+        while True:
+            try:
+                self.broker.connect()
+                self.broker.subscribe(self.config.cancel_channel, self._on_cancel)
+                return
+            except Exception as e:
+                print(f"⚠️  Cancellation listener disconnected: {e}")
+                time.sleep(5)
+
+    def _on_cancel(self, message: Dict[str, Any]):
+        """Record a cancellation and stop the job if it is running here"""
+        job_id = message.get('job_id')
+        now = time.time()
+        with self._lock:
+            self._cancelled[job_id] = now
+            for known, cancelled_at in list(self._cancelled.items()):
+                if now - cancelled_at > self.retention:
+                    del self._cancelled[known]
+            token = self._tokens.get(job_id)
+        if token is not None:
+            print(f"🛑 Cancelling running job {job_id}")
+            token.cancel()
+
+    def is_cancelled(self, job_id: str) -> bool:
+        """True if a cancellation for the job has been heard"""
+        with self._lock:
+            return job_id in self._cancelled
+
+    def watch(self, job_id: str, token: CancelToken):
+        """Cancel token when job_id is cancelled, including if it already was"""
+        with self._lock:
+            self._tokens[job_id] = token
+            cancelled = job_id in self._cancelled
+        if cancelled:
+            token.cancel()
+
+    def unwatch(self, job_id: str):
+        """Stop tracking a job that finished"""
+        with self._lock:
+            self._tokens.pop(job_id, None)
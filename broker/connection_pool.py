@@ -0,0 +1,139 @@
+"""
+Connection Pool - Reuse broker connections across publishes
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+from broker.base import BrokerBackend
+from broker.broker_client import BrokerConfig, create_broker
+
+
+class ConnectionPool:
+    """Thread-safe pool of connected broker clients
+    
+    Broker connections (a pika BlockingConnection in particular) must only be
+    used by one thread at a time, so the pool hands out whole clients
+    exclusively. Clients are health-checked on checkout and reconnected
+    transparently when the broker has dropped them.
+    """
+    
+    def __init__(self, config: BrokerConfig = None, max_size: int = None):
+        self.config = config or BrokerConfig()
+        self.max_size = max_size or int(os.getenv('BROKER_POOL_SIZE', '4'))
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._lock = threading.Condition()
+        
+    def _reconnect(self, client: BrokerBackend):
+        """Drop a broken connection and open a new one"""
+        try:
+            client.close()
+        except Exception:
+            pass
+        client.connect()
+        
+    def _checkout(self, timeout: float = None) -> BrokerBackend:
+        """Take an idle client, creating one if the pool is not full"""
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    client = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    self._created += 1
+                    client = None
+                    break
+                if not self._lock.wait(timeout):
+                    raise TimeoutError("Timed out waiting for a broker connection")
+                    
+        try:
+            if client is None:
+                client = create_broker(self.config)
+                client.connect()
+            elif not client.is_healthy():
+                print("⚠️  Pooled broker connection lost, reconnecting...")
+                self._reconnect(client)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+                self._lock.notify()
+            raise
+        return client
+        
+    def _checkin(self, client: BrokerBackend):
+        """Return a client to the pool"""
+        with self._lock:
+            if self._closed:
+                client.close()
+                self._created -= 1
+            else:
+                self._idle.append(client)
+            self._lock.notify()
+            
+    @contextmanager
+    def acquire(self, timeout: float = None):
+        """Borrow a connected client for the duration of a with-block"""
+        client = self._checkout(timeout)
+        try:
+            yield client
+        finally:
+            self._checkin(client)
+            
+    def publish_many(self, jobs: List[Dict[str, Any]], queue_name: str = None) -> List[bool]:
+        """Publish a batch through a pooled client, retrying once on a lost connection"""
+        with self.acquire() as client:
+            try:
+                return client.publish_many(jobs, queue_name)
+            except client.connection_errors:
+                print("⚠️  Broker connection lost while publishing, retrying...")
+                self._reconnect(client)
+                return client.publish_many(jobs, queue_name)
+                
+    def publish_routed(self, jobs: List[Dict[str, Any]]) -> List[bool]:
+        """Publish jobs on their static routes, retrying once on a lost connection"""
+        with self.acquire() as client:
+            try:
+                return client.publish_routed(jobs)
+            except client.connection_errors:
+                print("⚠️  Broker connection lost while publishing, retrying...")
+                self._reconnect(client)
+                return client.publish_routed(jobs)
+                
+    def broadcast(self, message: Dict[str, Any], channel: str) -> bool:
+        """Broadcast through a pooled client, retrying once on a lost connection"""
+        with self.acquire() as client:
+            try:
+                return client.broadcast(message, channel)
+            except client.connection_errors:
+                print("⚠️  Broker connection lost while publishing, retrying...")
+                self._reconnect(client)
+                return client.broadcast(message, channel)
+                
+    def close(self):
+        """Close all idle connections and refuse further checkouts"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._lock.notify_all()
+            
+        for client in idle:
+            client.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
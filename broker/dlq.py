@@ -0,0 +1,106 @@
+"""
+Dead-Letter Queue Tool - Inspect, replay and purge dead-lettered jobs
+"""
+import sys
+import os
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broker.broker_client import BrokerConfig, create_broker
+
+
+class DeadLetterTool:
+    """Operations on the dead-letter queue of a work queue"""
+    
+    def __init__(self, queue_name: str):
+        self.config = BrokerConfig()
+        self.broker = create_broker(self.config)
+        self.queue_name = queue_name
+        self.dlq_name = self.broker.dead_letter_queue(queue_name)
+        
+    def list(self, limit: int = 20):
+        """Print dead-lettered messages without removing them"""
+        fetched = self.broker.peek(self.dlq_name, limit)
+        
+        print(f"\n☠️  {self.dlq_name}: showing {len(fetched)} message(s)")
+        for message, headers in fetched:
+            print(f"{'-'*70}")
+            print(f"Job ID: {message.get('job_id', 'N/A')}")
+            print(f"Job Type: {message.get('job_type', 'N/A')}")
+            print(f"Retries: {headers.get('x-retry-count', 0)}")
+            print(f"Dead-lettered at: {headers.get('x-dead-lettered-at', 'N/A')}")
+            print(f"Error: {headers.get('x-last-error', 'N/A')}")
+            print(f"Body: {json.dumps(message)[:200]}")
+            
+    def replay(self, limit: int = None):
+        """Move dead-lettered messages back to their original queue with a fresh retry budget"""
+        replayed = 0
+        
+        while limit is None or replayed < limit:
+            delivery = self.broker.get_message(self.dlq_name)
+            if delivery is None:
+                break
+            delivery_tag, message, headers = delivery
+            target = headers.get('x-original-queue', self.queue_name)
+            
+            if self.broker.publish_many([message], target)[0]:
+                self.broker.ack(self.dlq_name, delivery_tag)
+                replayed += 1
+                print(f"↻ Replayed {message.get('job_id', 'N/A')} to {target}")
+            else:
+                self.broker.nack(self.dlq_name, delivery_tag, requeue=True)
+                print(f"✗ Replay of {message.get('job_id', 'N/A')} was not confirmed, stopping")
+                break
+                
+        print(f"✓ Replayed {replayed} message(s) from {self.dlq_name}")
+        
+    def purge(self):
+        """Drop every dead-lettered message"""
+        purged = 0
+        
+        while True:
+            delivery = self.broker.get_message(self.dlq_name)
+            if delivery is None:
+                break
+            self.broker.ack(self.dlq_name, delivery[0])
+            purged += 1
+            
+        print(f"✓ Purged {purged} message(s) from {self.dlq_name}")
+        
+    def close(self):
+        """Close the broker connection"""
+        self.broker.close()
+
+
+def main():
+    """Dead-letter queue CLI"""
+    import argparse
+    
+    config = BrokerConfig()
+    
+    parser = argparse.ArgumentParser(description='Inspect and replay dead-lettered jobs')
+    parser.add_argument('command', choices=['list', 'replay', 'purge'],
+                       help='Operation to run on the dead-letter queue')
+    parser.add_argument('--queue', type=str, default=config.job_queue,
+                       help='Work queue whose dead-letter queue to use')
+    parser.add_argument('--limit', type=int, default=None,
+                       help='Maximum number of messages to list or replay')
+                       
+    args = parser.parse_args()
+    
+    tool = DeadLetterTool(args.queue)
+    try:
+        tool.broker.connect()
+        if args.command == 'list':
+            tool.list(args.limit or 20)
+        elif args.command == 'replay':
+            tool.replay(args.limit)
+        elif args.command == 'purge':
+            tool.purge()
+    finally:
+        tool.close()
+
+
+if __name__ == "__main__":
+    main()
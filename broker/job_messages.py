@@ -0,0 +1,83 @@
+"""
+Job Messages - Helpers for fields shared by clients, scheduler and workers
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+from broker.job_types import find_job_type
+
+
+def deadline_from_ttl(ttl_seconds: float) -> str:
+    """Absolute UTC deadline for a job that must start within ttl_seconds"""
+    return (datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)).isoformat()
+
+
+def is_expired(job_data: Dict[str, Any]) -> bool:
+    """True if the job carries a deadline that has already passed"""
+    deadline = job_data.get('deadline')
+    if not deadline:
+        return False
+        
+    deadline = datetime.fromisoformat(deadline)
+    if deadline.tzinfo is None:
+        deadline = deadline.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) > deadline
+
+
+def queue_wait(job_data: Dict[str, Any]) -> Optional[float]:
+    """Seconds since the job's submit_time, by the submitter's and this host's wall clocks"""
+    submitted = job_data.get('submit_time')
+    if not submitted:
+        return None
+    try:
+        submitted = datetime.fromisoformat(submitted)
+    except (TypeError, ValueError):
+        return None
+    return (datetime.now(submitted.tzinfo) - submitted).total_seconds()
+
+
+def expired_result(job_data: Dict[str, Any], worker_id: str, worker_type: str) -> Dict[str, Any]:
+    """Result published instead of running a job whose deadline passed"""
+    return {
+        'job_id': job_data.get('job_id', 'unknown'),
+        'job_type': job_data.get('job_type'),
+        'worker_id': worker_id,
+        'worker_type': worker_type,
+        'status': 'expired',
+        'error': f"Deadline {job_data.get('deadline')} passed before execution",
+        'priority': job_data.get('priority'),
+        'end_time': datetime.now().isoformat(),
+        'processing_time': 0
+    }
+
+
+def interrupted_result(job_data: Dict[str, Any], worker_id: str, worker_type: str, status: str,
+                       error: str, processing_time: float, start_time: str = None) -> Dict[str, Any]:
+    """Result published for a job that was cancelled or timed out
+    
+    start_time is when the worker began processing it, None if it never did.
+    """
+    return {
+        'job_id': job_data.get('job_id', 'unknown'),
+        'job_type': job_data.get('job_type'),
+        'worker_id': worker_id,
+        'worker_type': worker_type,
+        'status': status,
+        'error': error,
+        'priority': job_data.get('priority'),
+        'submit_time': job_data.get('submit_time'),
+        'start_time': start_time,
+        'end_time': datetime.now().isoformat(),
+        'processing_time': processing_time
+    }
+
+
+def job_work(job_data: Dict[str, Any]) -> float:
+    """Approximate floating point operations a job performs, from its parameters
+    
+    Works on job messages and on the results workers publish, which echo the
+    same parameters, so history and live jobs are measured the same way.
+    Estimates come from the job type's declaration (see broker.job_types).
+    """
+    job_type = find_job_type(job_data.get('job_type'))
+    return job_type.estimate_work(job_data) if job_type else 1.0
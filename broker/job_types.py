@@ -0,0 +1,342 @@
+"""
+Job Types - Registry of the job types clients, scheduler and workers agree on
+"""
+import importlib
+import os
+import threading
+from typing import Dict, Any, Callable, Iterable, List, Optional, Union
+
+# Entry point group through which installed packages declare job types
+ENTRY_POINT_GROUP = 'gpu_cluster.job_types'
+
+# Compute precisions a job can ask for with ``dtype``, and their bytes per element
+DTYPES = {'float32': 4, 'bfloat16': 2, 'float16': 2}
+MEMORY_FORMATS = ('contiguous', 'channels_last')
+
+
+class Param:
+    """A job parameter: its type, default, lower bound or allowed values, and the CLI option that sets it"""
+
+    def __init__(self, kind: type, default: Any, minimum: float = None, cli: str = None, help: str = '',
+                 choices: Iterable[Any] = None):
+        self.kind = kind
+        self.default = default
+        self.minimum = minimum
+        self.cli = cli
+        self.help = help
+        self.choices = tuple(choices) if choices is not None else None
+
+    def check(self, name: str, value: Any):
+        """Raise ValueError if value is not acceptable for this parameter"""
+        accepted = (int, float) if self.kind is float else self.kind
+        if isinstance(value, bool) and self.kind is not bool or not isinstance(value, accepted):
+            raise ValueError(f"Parameter {name} must be {self.kind.__name__}, got {value!r}")
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"Parameter {name} must be at least {self.minimum}, got {value!r}")
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"Parameter {name} must be one of {', '.join(map(str, self.choices))}, got {value!r}")
+
+
+class JobType:
+    """Declaration of a job type
+
+    ``handler`` runs one job as ``handler(executor, job_data)`` and
+    ``batch_handler`` a coalesced batch as ``batch_handler(executor, jobs)``.
+    Either can be given as a 'module:attribute' string, imported the first
+    time a job of the type runs, so declaring a type never loads its code.
+    ``work`` and ``memory`` estimate the FLOPs and bytes of a job from its
+    parameters; jobs may share a batch when their ``batch_fields`` match.
+    """
+
+    def __init__(self, name: str, handler: Union[str, Callable], params: Dict[str, Param] = None,
+                 work: Callable[[Dict[str, Any]], float] = None,
+                 memory: Callable[[Dict[str, Any]], float] = None,
+                 batch_handler: Union[str, Callable] = None, batch_fields: Iterable[str] = (),
+                 description: str = ''):
+        self.name = name
+        self.handler = handler
+        self.batch_handler = batch_handler
+        self.params = params or {}
+        self.work = work
+        self.memory = memory
+        self.batch_fields = tuple(batch_fields)
+        self.description = description
+        self._lock = threading.Lock()
+
+    @property
+    def batchable(self) -> bool:
+        return self.batch_handler is not None
+
+    def _resolve(self, attribute: str) -> Callable:
+        """Import a handler given as 'module:attribute' and keep it"""
+        with self._lock:
+            target = getattr(self, attribute)
+            if isinstance(target, str):
+                module_name, _, path = target.partition(':')
+                target = importlib.import_module(module_name)
+                for part in path.split('.'):
+                    target = getattr(target, part)
+                setattr(self, attribute, target)
+            return target
+
+    def run(self, executor, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one job of this type"""
+        return self._resolve('handler')(executor, job_data)
+
+    def run_batch(self, executor, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute a coalesced batch of jobs of this type"""
+        if not self.batchable:
+            raise ValueError(f"Job type cannot be batched: {self.name}")
+        return self._resolve('batch_handler')(executor, jobs)
+
+    def param(self, job_data: Dict[str, Any], name: str) -> Any:
+        """Value of a parameter in a job, or its default"""
+        return job_data.get(name, self.params[name].default)
+
+    def batch_key(self, job_data: Dict[str, Any]) -> tuple:
+        """Values that must match for two jobs to share a batch"""
+        return tuple(self.param(job_data, name) for name in self.batch_fields)
+
+    def estimate_work(self, job_data: Dict[str, Any]) -> float:
+        """Approximate floating point operations of a job"""
+        return float(self.work(job_data)) if self.work else 1.0
+
+    def estimate_memory(self, job_data: Dict[str, Any]) -> Optional[float]:
+        """Approximate bytes a job keeps on its device, if the type can tell"""
+        return float(self.memory(job_data)) if self.memory else None
+
+    def validate(self, job_data: Dict[str, Any]):
+        """Raise ValueError if a job's parameters don't match the schema"""
+        for name, param in self.params.items():
+            if name in job_data:
+                param.check(name, job_data[name])
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON-friendly summary for clients and the dashboard"""
+        return {
+            'name': self.name,
+            'description': self.description,
+            'batchable': self.batchable,
+            'batch_fields': list(self.batch_fields),
+            'params': {name: {'type': param.kind.__name__, 'default': param.default,
+                              'minimum': param.minimum, 'help': param.help,
+                              'choices': list(param.choices) if param.choices is not None else None}
+                       for name, param in self.params.items()}
+        }
+
+
+_registry = {}
+_registry_lock = threading.RLock()
+_plugins_loaded = False
+
+
+def register(job_type: JobType) -> JobType:
+    """Add a job type, replacing any earlier declaration with the same name"""
+    with _registry_lock:
+        _registry[job_type.name] = job_type
+    return job_type
+
+
+def register_job_type(name: str, **declaration) -> Callable[[Callable], Callable]:
+    """Decorator declaring the decorated ``fn(executor, job_data)`` as a job type's handler
+
+    Takes the remaining JobType arguments (params, work, memory, ...). The
+    declaring module must be imported to register, e.g. via JOB_TYPE_MODULES.
+    """
+    def decorator(handler: Callable) -> Callable:
+        register(JobType(name, handler, **declaration))
+        return handler
+    return decorator
+
+
+def _load_plugins():
+    """Register job types from entry points and JOB_TYPE_MODULES, once"""
+    global _plugins_loaded
+    with _registry_lock:
+        if _plugins_loaded:
+            return
+        _plugins_loaded = True
+
+        from importlib.metadata import entry_points
+        found = entry_points()
+        if hasattr(found, 'select'):
+            group = found.select(group=ENTRY_POINT_GROUP)
+        else:
+            group = found.get(ENTRY_POINT_GROUP, [])
+        for entry_point in group:
+            try:
+                declared = entry_point.load()
+                if isinstance(declared, JobType):
+                    register(declared)
+                elif callable(declared):
+                    for job_type in declared() or ():
+                        register(job_type)
+            except Exception as e:
+                print(f"⚠️  Could not load job types from {entry_point.name}: {e}")
+
+        for module in filter(None, os.getenv('JOB_TYPE_MODULES', '').split(',')):
+            try:
+                importlib.import_module(module.strip())
+            except Exception as e:
+                print(f"⚠️  Could not load job types from {module}: {e}")
+
+
+def job_types() -> Dict[str, JobType]:
+    """Every registered job type by name"""
+    _load_plugins()
+    with _registry_lock:
+        return dict(_registry)
+
+
+def find_job_type(name: str) -> Optional[JobType]:
+    """The job type with this name, or None if it is not registered"""
+    _load_plugins()
+    with _registry_lock:
+        return _registry.get(name)
+
+
+def get_job_type(name: str) -> JobType:
+    """The job type with this name; ValueError if it is not registered"""
+    job_type = find_job_type(name)
+    if job_type is None:
+        raise ValueError(f"Unknown job type: {name}")
+    return job_type
+
+
+# Built-in job types, run by JobExecutor methods
+
+_EXECUTOR = 'workers.jobs.job_executor:JobExecutor'
+
+_DTYPE = Param(str, 'float32', cli='dtype', choices=DTYPES, help='Compute precision')
+
+
+def _element_bytes(job_data: Dict[str, Any]) -> int:
+    return DTYPES.get(job_data.get('dtype', 'float32'), 4)
+
+
+def _matrix_shape(job_data: Dict[str, Any]) -> tuple:
+    """(n, k, m) of a matrix multiplication, from its inputs or its size"""
+    inputs = job_data.get('inputs', {})
+    if 'a' in inputs and 'b' in inputs:
+        (n, k), m = inputs['a']['shape'], inputs['b']['shape'][1]
+        return n, k, m
+    size = job_data.get('size', 1000)
+    return size, size, size
+
+
+def _matrix_work(job_data: Dict[str, Any]) -> float:
+    n, k, m = _matrix_shape(job_data)
+    return 2.0 * n * k * m * job_data.get('iterations', 10)
+
+
+def _matrix_memory(job_data: Dict[str, Any]) -> float:
+    n, k, m = _matrix_shape(job_data)
+    return float(_element_bytes(job_data)) * (n * k + k * m + n * m)
+
+
+def _nn_weights(job_data: Dict[str, Any]) -> int:
+    """Weights of the two-layer network"""
+    return (job_data.get('input_size', 784) * job_data.get('hidden_size', 256)
+            + job_data.get('hidden_size', 256) * job_data.get('output_size', 10))
+
+
+def _nn_work(job_data: Dict[str, Any]) -> float:
+    # Forward plus backward pass is ~6 FLOPs per weight per sample
+    samples = job_data.get('batch_size', 64) * 100 * job_data.get('epochs', 5)
+    return 6.0 * _nn_weights(job_data) * samples
+
+
+def _nn_memory(job_data: Dict[str, Any]) -> float:
+    # Weights, gradients and two Adam moments; autocast keeps them in float32
+    element_bytes = 4 if job_data.get('autocast') else _element_bytes(job_data)
+    return 4.0 * element_bytes * _nn_weights(job_data)
+
+
+def _vector_work(job_data: Dict[str, Any]) -> float:
+    return float(job_data.get('size', 10000000)) * job_data.get('iterations', 100)
+
+
+def _vector_memory(job_data: Dict[str, Any]) -> float:
+    return 3.0 * _element_bytes(job_data) * job_data.get('size', 10000000)
+
+
+def _image_shape(job_data: Dict[str, Any]) -> tuple:
+    """(batch, height, width) of an image processing job"""
+    images = job_data.get('inputs', {}).get('images')
+    if images:
+        batch_size, _, height, width = images['shape']
+        return batch_size, height, width
+    size = job_data.get('image_size', 224)
+    return job_data.get('batch_size', 32), size, size
+
+
+def _image_work(job_data: Dict[str, Any]) -> float:
+    # 3x3 convolution from 3 to 64 channels
+    batch_size, height, width = _image_shape(job_data)
+    return 2.0 * batch_size * height * width * 64 * 3 * 9 * job_data.get('iterations', 50)
+
+
+def _image_memory(job_data: Dict[str, Any]) -> float:
+    # Input images and the 64-channel feature maps
+    batch_size, height, width = _image_shape(job_data)
+    return float(_element_bytes(job_data)) * batch_size * height * width * (3 + 64)
+
+
+register(JobType(
+    'matrix_multiply', f'{_EXECUTOR}.matrix_multiply',
+    batch_handler=f'{_EXECUTOR}.matrix_multiply_batch',
+    params={
+        'size': Param(int, 1000, minimum=1, cli='size', help='Matrix dimension'),
+        'iterations': Param(int, 10, minimum=1, cli='iterations', help='Multiplications to time'),
+        'dtype': _DTYPE
+    },
+    work=_matrix_work,
+    memory=_matrix_memory,
+    batch_fields=('size', 'iterations', 'dtype'),
+    description='Square matrix multiplication benchmark'
+))
+
+register(JobType(
+    'neural_network', f'{_EXECUTOR}.neural_network_training',
+    params={
+        'epochs': Param(int, 5, minimum=1, cli='epochs', help='Training epochs'),
+        'batch_size': Param(int, 64, minimum=1, cli='batch_size', help='Samples per step'),
+        'input_size': Param(int, 784, minimum=1, help='Input features'),
+        'hidden_size': Param(int, 256, minimum=1, help='Hidden units'),
+        'output_size': Param(int, 10, minimum=1, help='Output classes'),
+        'dtype': _DTYPE,
+        'autocast': Param(bool, False, cli='autocast', help='Mixed precision: float32 weights, dtype compute')
+    },
+    work=_nn_work,
+    memory=_nn_memory,
+    description='Two-layer MLP training on random data'
+))
+
+register(JobType(
+    'vector_add', f'{_EXECUTOR}.vector_addition',
+    params={
+        'size': Param(int, 10000000, minimum=1, cli='size', help='Vector length'),
+        'iterations': Param(int, 100, minimum=1, cli='iterations', help='Additions to time'),
+        'dtype': _DTYPE
+    },
+    work=_vector_work,
+    memory=_vector_memory,
+    description='Element-wise vector addition benchmark'
+))
+
+register(JobType(
+    'image_processing', f'{_EXECUTOR}.image_processing',
+    batch_handler=f'{_EXECUTOR}.image_processing_batch',
+    params={
+        'batch_size': Param(int, 32, minimum=1, cli='batch_size', help='Images per batch'),
+        'image_size': Param(int, 224, minimum=1, cli='size', help='Image height and width'),
+        'iterations': Param(int, 50, minimum=1, cli='iterations', help='Convolutions to time'),
+        'dtype': _DTYPE,
+        'memory_format': Param(str, 'contiguous', cli='memory_format', choices=MEMORY_FORMATS,
+                               help='Tensor layout of images and weights')
+    },
+    work=_image_work,
+    memory=_image_memory,
+    batch_fields=('batch_size', 'image_size', 'iterations', 'dtype', 'memory_format'),
+    description='3x3 convolution over a batch of images'
+))
@@ -0,0 +1,229 @@
+"""
+In-Memory Broker - Process-local queues for single-box load testing
+"""
+import copy
+import functools
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List
+
+from broker.base import BrokerBackend, OrderedSettler, RequeueMessage
+from broker.broker_client import BrokerConfig
+
+
+class _MemoryQueue:
+    """A thread-safe priority queue of (message, headers) envelopes with unacked tracking
+    
+    Callers must hold ``cond``. Entries are ordered by priority, then by
+    publish order; a requeued entry keeps its original position.
+    """
+    
+    def __init__(self):
+        self.ready = []
+        self.unacked = {}
+        self.cond = threading.Condition()
+        self._sequence = itertools.count()
+        
+    def push(self, envelope, priority: int = 0, sequence: int = None):
+        """Add an envelope to the ready heap"""
+        if sequence is None:
+            sequence = next(self._sequence)
+        heapq.heappush(self.ready, (-priority, sequence, envelope))
+        
+    def pop(self):
+        """Take the highest-priority envelope as (priority, sequence, envelope)"""
+        neg_priority, sequence, envelope = heapq.heappop(self.ready)
+        return -neg_priority, sequence, envelope
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+_delivery_tags = itertools.count(1)
+_subscribers = {}
+
+
+def _get_queue(name: str) -> _MemoryQueue:
+    """Return the shared queue with this name, creating it on first use"""
+    with _queues_lock:
+        if name not in _queues:
+            _queues[name] = _MemoryQueue()
+        return _queues[name]
+
+
+def reset():
+    """Drop every in-memory queue (useful between load-test runs)"""
+    with _queues_lock:
+        _queues.clear()
+
+
+class InMemoryBroker(BrokerBackend):
+    """Broker backed by queues shared by every client in the current process
+    
+    Scheduler, workers and clients started as threads of one process can talk
+    to each other without any external service. Nothing is persisted.
+    """
+    
+    def __init__(self, config: BrokerConfig = None):
+        self.config = config or BrokerConfig()
+        self._consuming = False
+        self._draining = False
+        
+    def connect(self):
+        """Declare the standard queues"""
+        for queue in self.config.standard_queues:
+            _get_queue(queue)
+            
+    def close(self):
+        """Stop any consume loop running on this client"""
+        self._consuming = False
+        
+    def publish_many(self, jobs: List[Dict[str, Any]], queue_name: str = None,
+                     headers: Dict[str, Any] = None) -> List[bool]:
+        """Append a batch of messages to a queue"""
+        queue = _get_queue(queue_name or self.config.job_queue)
+        
+        # Copy so publisher and consumer never share mutable state
+        envelopes = [(copy.deepcopy(job), dict(headers or {})) for job in jobs]
+        with queue.cond:
+            for envelope in envelopes:
+                queue.push(envelope, self.config.message_priority(envelope[0]) or 0)
+            queue.cond.notify(len(envelopes))
+        return [True] * len(envelopes)
+        
+    def publish_delayed(self, job_data: Dict[str, Any], queue_name: str, delay: float,
+                        headers: Dict[str, Any] = None) -> bool:
+        """Publish a message after delay seconds from a timer thread"""
+        timer = threading.Timer(delay, self.publish_many, args=([job_data], queue_name, headers))
+        timer.daemon = True
+        timer.start()
+        return True
+        
+    def broadcast(self, message: Dict[str, Any], channel: str) -> bool:
+        """Call every subscriber of a channel with its own copy of the message"""
+        with _queues_lock:
+            callbacks = list(_subscribers.get(channel, []))
+        for callback in callbacks:
+            try:
+                callback(copy.deepcopy(message))
+            except Exception as e:
+                print(f"✗ Error handling broadcast on {channel}: {e}")
+        return True
+        
+    def subscribe(self, channel: str, callback: Callable):
+        """Register for broadcasts on a channel until close() is called"""
+        with _queues_lock:
+            _subscribers.setdefault(channel, []).append(callback)
+        self._consuming = True
+        try:
+            while self._consuming:
+                time.sleep(0.5)
+        finally:
+            with _queues_lock:
+                _subscribers[channel].remove(callback)
+                
+    def get_message(self, queue_name: str):
+        """Take one message off a queue without consuming"""
+        queue = _get_queue(queue_name)
+        with queue.cond:
+            if not queue.ready:
+                return None
+            entry = queue.pop()
+            delivery_tag = next(_delivery_tags)
+            queue.unacked[delivery_tag] = entry
+            
+        message, headers = entry[2]
+        return delivery_tag, copy.deepcopy(message), dict(headers)
+        
+    def consume(self, queue_name: str, callback: Callable, prefetch: int = None, concurrency: int = None,
+                ordered: bool = False):
+        """Consume messages from a queue until close() is called"""
+        queue = _get_queue(queue_name)
+        prefetch = prefetch or self.config.prefetch
+        concurrency = self.config.concurrency if concurrency is None else concurrency
+        pool = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 0 else None
+        settler = OrderedSettler() if ordered and pool else None
+        slots = threading.Semaphore(prefetch)
+        self._consuming = not self._draining
+        
+        def on_done(delivery_tag, envelope, sequence, future):
+            if future.cancelled():
+                error = RequeueMessage("Consumer stopped before the message was processed")
+            else:
+                error = future.exception()
+                
+            def settle():
+                self.settle(queue_name, delivery_tag, *envelope, error)
+                slots.release()
+                
+            if settler:
+                settler.complete(sequence, settle)
+            else:
+                settle()
+            
+        print(f"⏳ Waiting for messages in {queue_name} (prefetch={prefetch}, concurrency={concurrency})...")
+        try:
+            while self._consuming:
+                if not slots.acquire(timeout=0.5):
+                    continue
+                    
+                with queue.cond:
+                    if not queue.ready:
+                        queue.cond.wait(timeout=0.5)
+                    if not queue.ready:
+                        slots.release()
+                        continue
+                    entry = queue.pop()
+                    delivery_tag = next(_delivery_tags)
+                    queue.unacked[delivery_tag] = entry
+                    envelope = entry[2]
+                    
+                message = self._decoded(lambda: copy.deepcopy(envelope[0]))
+                if pool is None:
+                    try:
+                        callback(message)
+                    except Exception as e:
+                        self.settle(queue_name, delivery_tag, *envelope, e)
+                    else:
+                        self.settle(queue_name, delivery_tag, *envelope)
+                    slots.release()
+                else:
+                    sequence = settler.register() if settler else None
+                    future = pool.submit(callback, message)
+                    future.add_done_callback(functools.partial(on_done, delivery_tag, envelope, sequence))
+        finally:
+            if pool:
+                # Deliveries still waiting for a thread are requeued by on_done
+                pool.shutdown(wait=False, cancel_futures=True)
+            if self._draining:
+                # Every prefetch slot is free again once all deliveries are settled
+                for _ in range(prefetch):
+                    slots.acquire()
+                    
+    def stop_consuming(self):
+        """Stop taking messages and let consume() return once in-flight ones are settled"""
+        self._draining = True
+        self._consuming = False
+        
+    def ack(self, queue_name: str, delivery_tag):
+        """Forget a delivered message"""
+        queue = _get_queue(queue_name)
+        with queue.cond:
+            queue.unacked.pop(delivery_tag, None)
+            
+    def nack(self, queue_name: str, delivery_tag, requeue: bool = True):
+        """Reject a delivered message, putting it back at the head of the queue"""
+        queue = _get_queue(queue_name)
+        with queue.cond:
+            entry = queue.unacked.pop(delivery_tag, None)
+            if requeue and entry is not None:
+                queue.push(entry[2], entry[0], entry[1])
+                queue.cond.notify()
+                
+    def queue_depth(self, queue_name: str) -> int:
+        """Number of messages waiting in a queue"""
+        queue = _get_queue(queue_name)
+        with queue.cond:
+            return len(queue.ready)
@@ -0,0 +1,347 @@
+"""
+Redis Streams Broker - Queues as streams consumed through consumer groups
+"""
+import base64
+import functools
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List
+
+import redis
+
+from broker.base import BrokerBackend, NonRetryableError, OrderedSettler, RequeueMessage
+from broker.broker_client import BrokerConfig, MessageCodec, create_codec
+
+
+class RedisStreamsClient(BrokerBackend):
+    """Broker client that maps each queue onto a Redis stream
+    
+    Every queue has a single consumer group, so consumers of the same queue
+    compete for entries like RabbitMQ consumers do. Acked entries are deleted
+    from the stream, which keeps XLEN equal to the number of waiting plus
+    in-flight messages. Entries left pending by a dead consumer are reclaimed
+    after ``REDIS_CLAIM_IDLE_MS``.
+    """
+    
+    connection_errors = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+    
+    def __init__(self, config: BrokerConfig = None):
+        self.config = config or BrokerConfig()
+        self.redis = None
+        self._groups = set()
+        self._consuming = False
+        self._draining = False
+        self.codec = create_codec(self.config)
+        
+    def connect(self):
+        """Connect to Redis and create the consumer groups"""
+        self.redis = redis.Redis(
+            host=self.config.redis_host,
+            port=self.config.redis_port,
+            db=self.config.redis_db,
+            password=self.config.redis_password
+        )
+        self.redis.ping()
+        self._groups = set()
+        
+        for queue in self.config.standard_queues:
+            self._ensure_group(queue)
+            
+        print(f"✓ Connected to Redis at {self.config.redis_host}:{self.config.redis_port}")
+        
+    def is_healthy(self) -> bool:
+        """Ping the server"""
+        if not self.redis:
+            return False
+        try:
+            return bool(self.redis.ping())
+        except self.connection_errors:
+            return False
+            
+    def _ensure_group(self, queue_name: str):
+        """Create the stream and its consumer group if they do not exist yet"""
+        if queue_name in self._groups:
+            return
+        try:
+            self.redis.xgroup_create(queue_name, self.config.redis_group, id='0', mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._groups.add(queue_name)
+        
+    def publish_many(self, jobs: List[Dict[str, Any]], queue_name: str = None,
+                     headers: Dict[str, Any] = None) -> List[bool]:
+        """Append a batch of messages to a stream in one pipeline round-trip"""
+        if not self.redis:
+            self.connect()
+            
+        queue = queue_name or self.config.job_queue
+        self._ensure_group(queue)
+        encoded_headers = json.dumps(headers or {})
+        # Stands in for RabbitMQ's x-message-ttl on telemetry streams nobody may be reading
+        maxlen = self.config.stream_maxlen(queue)
+        
+        pipe = self.redis.pipeline(transaction=False)
+        for job_data in jobs:
+            pipe.xadd(queue, self._fields(job_data, encoded_headers), maxlen=maxlen, approximate=True)
+        entry_ids = pipe.execute(raise_on_error=False)
+        
+        results = [not isinstance(entry_id, Exception) for entry_id in entry_ids]
+        failed = results.count(False)
+        if failed:
+            print(f"✗ {failed}/{len(jobs)} messages to {queue} were not stored")
+        return results
+        
+    def publish_delayed(self, job_data: Dict[str, Any], queue_name: str, delay: float,
+                        headers: Dict[str, Any] = None) -> bool:
+        """Park a message in a sorted set scored by the time it becomes due"""
+        if not self.redis:
+            self.connect()
+            
+        fields = self._fields(job_data, json.dumps(headers or {}))
+        entry = json.dumps({
+            'id': uuid.uuid4().hex,
+            'body': base64.b64encode(fields['body']).decode('ascii'),
+            'content_type': fields['content_type'],
+            'content_encoding': fields['content_encoding'],
+            'headers': fields['headers']
+        })
+        self.redis.zadd(f"{queue_name}:delayed", {entry: time.time() + delay})
+        return True
+        
+    def _promote_delayed(self, queue_name: str):
+        """Move due delayed messages onto the stream"""
+        delayed_key = f"{queue_name}:delayed"
+        for entry in self.redis.zrangebyscore(delayed_key, '-inf', time.time(), start=0, num=100):
+            # Only the consumer whose ZREM succeeds re-publishes the entry
+            if self.redis.zrem(delayed_key, entry):
+                fields = json.loads(entry)
+                fields['body'] = base64.b64decode(fields['body'])
+                del fields['id']
+                self.redis.xadd(queue_name, fields)
+                
+    def peek(self, queue_name: str, limit: int) -> List[tuple]:
+        """Read entries with XRANGE; nack would re-append them at the tail"""
+        if not self.redis:
+            self.connect()
+        return [(self._decode(fields), self._headers(fields))
+                for _, fields in self.redis.xrange(queue_name, count=limit)]
+                
+    def get_message(self, queue_name: str):
+        """Read one entry through the consumer group without blocking"""
+        if not self.redis:
+            self.connect()
+        self._ensure_group(queue_name)
+        
+        response = self.redis.xreadgroup(
+            self.config.redis_group,
+            self.config.consumer_name,
+            {queue_name: '>'},
+            count=1
+        )
+        if not response or not response[0][1]:
+            return None
+        entry_id, fields = response[0][1][0]
+        return entry_id, self._decode(fields), self._headers(fields)
+        
+    def broadcast(self, message: Dict[str, Any], channel: str) -> bool:
+        """Publish a message on a Redis pub/sub channel"""
+        if not self.redis:
+            self.connect()
+        # Broadcasts are small control messages; plain JSON keeps them codec-independent
+        self.redis.publish(channel, json.dumps(message))
+        return True
+        
+    def subscribe(self, channel: str, callback: Callable):
+        """Listen on a Redis pub/sub channel until close() is called"""
+        if not self.redis:
+            self.connect()
+            
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(channel)
+        self._consuming = True
+        try:
+            while self._consuming:
+                entry = pubsub.get_message(timeout=1.0)
+                if entry is None:
+                    continue
+                try:
+                    callback(json.loads(entry['data']))
+                except Exception as e:
+                    print(f"✗ Error handling broadcast on {channel}: {e}")
+        finally:
+            pubsub.close()
+            
+    def _fields(self, job_data: Dict[str, Any], encoded_headers: str) -> Dict[str, Any]:
+        """Stream entry fields for a message"""
+        body, content_type, content_encoding = self.codec.encode(job_data)
+        return {
+            'body': body,
+            'content_type': content_type,
+            'content_encoding': content_encoding or '',
+            'headers': encoded_headers
+        }
+        
+    @staticmethod
+    def _decode(fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+        """Decode a message body using the format recorded next to it"""
+        content_type = fields.get(b'content_type', b'').decode() or None
+        content_encoding = fields.get(b'content_encoding', b'').decode() or None
+        return MessageCodec.decode(fields[b'body'], content_type, content_encoding)
+        
+    @staticmethod
+    def _headers(fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+        """Decode the headers stored next to a message body"""
+        return json.loads(fields.get(b'headers', b'{}'))
+        
+    def _read(self, queue_name: str, claim_due: bool, count: int = 1):
+        """Fetch the next entries for this consumer, reclaiming stale ones when due"""
+        if claim_due:
+            claimed = self.redis.xautoclaim(
+                queue_name,
+                self.config.redis_group,
+                self.config.consumer_name,
+                min_idle_time=self.config.redis_claim_idle_ms,
+                start_id='0-0',
+                count=count
+            )
+            if claimed[1]:
+                return claimed[1]
+                
+        response = self.redis.xreadgroup(
+            self.config.redis_group,
+            self.config.consumer_name,
+            {queue_name: '>'},
+            count=count,
+            block=self.config.redis_block_ms
+        )
+        return response[0][1] if response else []
+        
+    def consume(self, queue_name: str, callback: Callable, prefetch: int = None, concurrency: int = None,
+                ordered: bool = False):
+        """Consume messages from a stream until close() is called"""
+        if not self.redis:
+            self.connect()
+        self._ensure_group(queue_name)
+        
+        prefetch = prefetch or self.config.prefetch
+        concurrency = self.config.concurrency if concurrency is None else concurrency
+        pool = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 0 else None
+        in_flight = threading.Semaphore(prefetch)
+        settler = OrderedSettler() if ordered and pool else None
+        self._consuming = not self._draining
+        
+        claim_interval = self.config.redis_claim_idle_ms / 1000
+        next_claim = time.monotonic()
+        
+        def run(entry_id, fields, sequence=None):
+            headers = {}
+            try:
+                headers = self._headers(fields)
+                message = self._decoded(lambda: self._decode(fields))
+            except Exception as e:
+                message = {'raw_body': fields.get(b'body', b'').decode('utf-8', errors='replace')}
+                error = NonRetryableError(f"Undecodable message: {e}")
+            else:
+                try:
+                    callback(message)
+                except Exception as e:
+                    message, error = self._decode(fields), e
+                else:
+                    error = None
+            finish(entry_id, message, headers, error, sequence)
+            
+        def finish(entry_id, message, headers, error, sequence):
+            def settle():
+                try:
+                    self.settle(queue_name, entry_id, message, headers, error)
+                finally:
+                    in_flight.release()
+                    
+            if settler:
+                settler.complete(sequence, settle)
+            else:
+                settle()
+                
+        def on_done(entry_id, fields, sequence, future):
+            # Entries still waiting for a thread when consuming stops go back as they are
+            if future.cancelled():
+                finish(entry_id, None, {},
+                       RequeueMessage("Consumer stopped before the message was processed"), sequence)
+            elif future.exception() is not None:
+                # run() frees the slot even if settling fails; the entry stays pending until reclaimed
+                print(f"✗ Could not settle message {entry_id}: {future.exception()}")
+                
+        print(f"⏳ Waiting for messages in {queue_name} (prefetch={prefetch}, concurrency={concurrency})...")
+        try:
+            while self._consuming:
+                if not in_flight.acquire(timeout=0.5):
+                    continue
+                # Read as many entries as there are free prefetch slots
+                free = 1
+                while free < prefetch and in_flight.acquire(blocking=False):
+                    free += 1
+                    
+                claim_due = time.monotonic() >= next_claim
+                if claim_due:
+                    next_claim = time.monotonic() + claim_interval
+                self._promote_delayed(queue_name)
+                
+                entries = self._read(queue_name, claim_due, free)
+                for _ in range(free - len(entries)):
+                    in_flight.release()
+                    
+                for entry_id, fields in entries:
+                    if pool is None:
+                        run(entry_id, fields)
+                    else:
+                        sequence = settler.register() if settler else None
+                        future = pool.submit(run, entry_id, fields, sequence)
+                        future.add_done_callback(functools.partial(on_done, entry_id, fields, sequence))
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+            if self._draining:
+                # Every prefetch slot is free again once all entries are settled
+                for _ in range(prefetch):
+                    in_flight.acquire()
+                    
+    def stop_consuming(self):
+        """Stop reading entries and let consume() return once in-flight ones are settled"""
+        self._draining = True
+        self._consuming = False
+                
+    def ack(self, queue_name: str, delivery_tag):
+        """Acknowledge and delete a stream entry"""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xack(queue_name, self.config.redis_group, delivery_tag)
+        pipe.xdel(queue_name, delivery_tag)
+        pipe.execute()
+        
+    def nack(self, queue_name: str, delivery_tag, requeue: bool = True):
+        """Reject a stream entry, re-appending it when requeued"""
+        entries = self.redis.xrange(queue_name, min=delivery_tag, max=delivery_tag)
+        
+        pipe = self.redis.pipeline(transaction=True)
+        if requeue and entries:
+            pipe.xadd(queue_name, entries[0][1])
+        pipe.xack(queue_name, self.config.redis_group, delivery_tag)
+        pipe.xdel(queue_name, delivery_tag)
+        pipe.execute()
+        
+    def queue_depth(self, queue_name: str) -> int:
+        """Number of waiting or in-flight entries in a stream"""
+        if not self.redis:
+            self.connect()
+        return self.redis.xlen(queue_name)
+        
+    def close(self):
+        """Close connection"""
+        self._consuming = False
+        if self.redis:
+            self.redis.close()
+            self.redis = None
+            print("✓ Connection closed")
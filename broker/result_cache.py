@@ -0,0 +1,206 @@
+"""
+Result Cache - Reuse results of jobs already run with identical parameters
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from broker.broker_client import BrokerConfig
+
+
+# Message fields that describe a submission rather than the computation
+ENVELOPE_FIELDS = {
+    'job_id', 'submit_time', 'prefer_gpu', 'strict_device', 'priority', 'deadline',
+    'use_cache', 'predicted_runtime', 'stolen_from', 'timeout_s'
+}
+
+
+def cache_key(job_data: Dict[str, Any], device_class: str) -> str:
+    """Canonical hash of a job's type, parameters (including seed) and device class"""
+    params = {k: v for k, v in job_data.items() if k not in ENVELOPE_FIELDS}
+    canonical = json.dumps({'device': device_class, **params}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def is_cacheable(job_data: Dict[str, Any]) -> bool:
+    """True if the job opted in, its data is reproducible and its result does not reference per-job blobs
+    
+    Only a seed or blob inputs pin down a job's data; unseeded jobs draw new
+    random tensors every run, so their results cannot stand in for each other.
+    """
+    reproducible = job_data.get('seed') is not None or bool(job_data.get('inputs'))
+    return bool(job_data.get('use_cache')) and reproducible and not job_data.get('store_output')
+
+
+class ResultCache(ABC):
+    """Size-bounded LRU store of job results with a time-to-live"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result, or None if missing or expired"""
+
+    @abstractmethod
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result, evicting the least recently used entries over the bound"""
+
+
+class MemoryResultCache(ResultCache):
+    """Cache local to one process"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(result)
+
+    def put(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskResultCache(ResultCache):
+    """One JSON file per entry; recency is tracked in the file's mtime
+
+    The directory can be a volume shared by the scheduler and workers.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, directory: str):
+        super().__init__(ttl, max_entries)
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        """File backing an entry"""
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry['expires_at'] < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry['result']
+
+    def put(self, key: str, result: Dict[str, Any]):
+        # Write then rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'expires_at': time.time() + self.ttl, 'result': result}, f)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        """Remove the least recently used entries beyond max_entries"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    entries.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+                except OSError:
+                    pass
+
+        entries.sort()
+        for _, name in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class RedisResultCache(ResultCache):
+    """Entries as expiring keys, with a sorted set of access times for LRU bounds"""
+
+    def __init__(self, ttl: float, max_entries: int, config: BrokerConfig):
+        super().__init__(ttl, max_entries)
+        import redis
+        self.redis = redis.Redis(
+            host=config.redis_host,
+            port=config.redis_port,
+            db=config.redis_db,
+            password=config.redis_password
+        )
+        self.prefix = 'sd:result-cache:'
+        self.lru_key = 'sd:result-cache:lru'
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.redis.get(self.prefix + key)
+        if value is None:
+            self.redis.zrem(self.lru_key, key)
+            return None
+        self.redis.zadd(self.lru_key, {key: time.time()})
+        return json.loads(value)
+
+    def put(self, key: str, result: Dict[str, Any]):
+        pipe = self.redis.pipeline()
+        pipe.set(self.prefix + key, json.dumps(result), ex=max(1, int(self.ttl)))
+        pipe.zadd(self.lru_key, {key: time.time()})
+        pipe.zcard(self.lru_key)
+        size = pipe.execute()[-1]
+
+        excess = size - self.max_entries
+        if excess > 0:
+            evicted = [k.decode() for k, _ in self.redis.zpopmin(self.lru_key, excess)]
+            self.redis.delete(*[self.prefix + k for k in evicted])
+
+
+def create_result_cache(config: BrokerConfig = None) -> Optional[ResultCache]:
+    """Create the cache selected by RESULT_CACHE (none, memory, disk or redis)
+
+    Workers store results and the scheduler looks them up, so the default is
+    a cache they share: redis with the Redis broker, disk otherwise. memory
+    is private to one process and only hits within it.
+    """
+    config = config or BrokerConfig()
+    default = 'redis' if config.backend == 'redis' else 'disk'
+    backend = os.getenv('RESULT_CACHE', default).lower()
+    ttl = float(os.getenv('RESULT_CACHE_TTL', '3600'))
+    max_entries = int(os.getenv('RESULT_CACHE_SIZE', '1024'))
+
+    if backend == 'none':
+        return None
+    elif backend == 'memory':
+        return MemoryResultCache(ttl, max_entries)
+    elif backend == 'disk':
+        directory = os.getenv('RESULT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'sd-result-cache'))
+        return DiskResultCache(ttl, max_entries, directory)
+    elif backend == 'redis':
+        return RedisResultCache(ttl, max_entries, config)
+    else:
+        raise ValueError(f"Unknown result cache backend: {backend}")
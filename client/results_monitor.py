@@ -4,23 +4,35 @@ Results Monitor - Listen for job results and collect metrics
 import sys
 import os
 import json
+import threading
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from broker.broker_client import RabbitMQClient, BrokerConfig
+from broker.broker_client import BrokerConfig, create_broker
 
 
 class ResultsMonitor:
     """Monitor and collect job results"""
     
+    # Finished job ids remembered to drop late progress events; they arrive
+    # just after the result, so only the most recent ones are needed
+    FINISHED_IDS_KEPT = 10000
+    
     def __init__(self, output_file: str = None):
-        self.broker = RabbitMQClient()
+        self.broker = create_broker()
         self.config = BrokerConfig()
         self.results = []
         self.stats = defaultdict(lambda: {'count': 0, 'total_time': 0, 'min_time': float('inf'), 'max_time': 0})
         self.output_file = output_file or 'results/job_results.json'
+        self.progress_file = os.path.join(os.path.dirname(self.output_file), 'job_progress.json')
+        
+        # Latest progress event of each running job, dropped when its result arrives
+        self.progress = {}
+        self._finished = OrderedDict()
+        self._progress_lock = threading.Lock()
+        self.progress_broker = create_broker(self.config)
         
         print("📊 Results Monitor initialized")
         
@@ -37,11 +49,33 @@ class ResultsMonitor:
         print(f"   Worker: {worker_type} ({result_data.get('worker_id', 'unknown')})")
         print(f"   Processing time: {processing_time:.4f}s")
         
+        # Result publish and delivery, from the worker's end_time to now (wall clocks)
+        timings = result_data.get('timings')
+        if isinstance(timings, dict) and result_data.get('end_time'):
+            try:
+                ended = datetime.fromisoformat(result_data['end_time'])
+                timings['result_delivery_ms'] = round((datetime.now() - ended).total_seconds() * 1000, 4)
+            except ValueError:
+                pass
+            print("   Timings: " + ", ".join(f"{name[:-3]} {value:.1f}ms" for name, value in timings.items()
+                                           if name.endswith('_ms') and value is not None))
+        
+        with self._progress_lock:
+            self._finished[job_id] = None
+            if len(self._finished) > self.FINISHED_IDS_KEPT:
+                self._finished.popitem(last=False)
+            finished = self.progress.pop(job_id, None) is not None
+        if finished:
+            self.save_progress()
+        
         if status == 'completed':
             job_type = result_data.get('job_type', 'unknown')
             print(f"   Job type: {job_type}")
             
-            # Update stats
+            # Update stats; cache hits are kept apart from real executions
+            if result_data.get('cache_hit'):
+                print(f"   Served from result cache")
+                worker_type = 'cache'
             key = f"{job_type}_{worker_type}"
             self.stats[key]['count'] += 1
             self.stats[key]['total_time'] += processing_time
@@ -72,6 +106,44 @@ class ResultsMonitor:
                 'timestamp': datetime.now().isoformat()
             }, f, indent=2)
     
+    def process_progress(self, event: dict):
+        """Track the latest progress event of a running job"""
+        job_id = event.get('job_id', 'unknown')
+        with self._progress_lock:
+            # Events published just before the result can arrive after it
+            if job_id in self._finished:
+                return
+            self.progress[job_id] = event
+            
+        eta = event.get('eta_s')
+        line = f"⏳ {job_id}: {event.get('progress', 0):.0%} ({event.get('done')}/{event.get('total')})"
+        if event.get('loss') is not None:
+            line += f" loss={event['loss']:.4f}"
+        if eta is not None:
+            line += f" ETA {eta:.1f}s"
+        print(line)
+        self.save_progress()
+        
+    def save_progress(self):
+        """Save progress of running jobs next to the results file"""
+        os.makedirs(os.path.dirname(self.progress_file), exist_ok=True)
+        
+        with self._progress_lock:
+            running = list(self.progress.values())
+        with open(self.progress_file, 'w') as f:
+            json.dump({
+                'running': running,
+                'timestamp': datetime.now().isoformat()
+            }, f, indent=2)
+            
+    def _consume_progress(self):
+        """Consume progress events on a second connection"""
+        try:
+            self.progress_broker.connect()
+            self.progress_broker.consume(self.config.progress_queue, self.process_progress, concurrency=0)
+        except Exception as e:
+            print(f"⚠️  Progress monitoring stopped: {e}")
+            
     def print_stats(self):
         """Print current statistics"""
         if not self.stats:
@@ -96,6 +168,8 @@ class ResultsMonitor:
         print("\n🎯 Results Monitor is ready!")
         print("⏳ Waiting for results...\n")
         
+        threading.Thread(target=self._consume_progress, name='progress', daemon=True).start()
+        
         try:
             self.broker.connect()
             self.broker.consume(self.config.result_queue, self.process_result)
@@ -108,6 +182,7 @@ class ResultsMonitor:
             print(f"❌ Error: {e}")
             print(f"🔍 Traceback: {traceback.format_exc()}")
         finally:
+            self.progress_broker.close()
             self.broker.close()
 
 
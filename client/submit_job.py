@@ -5,44 +5,119 @@ import sys
 import os
 import uuid
 from datetime import datetime
-import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from broker.broker_client import RabbitMQClient, BrokerConfig
+from broker.blob_store import BlobStore
+from broker.cancellation import cancel_message
+from broker.connection_pool import ConnectionPool, get_pool
+from broker.job_messages import deadline_from_ttl
+from broker.job_types import DTYPES, MEMORY_FORMATS, get_job_type, job_types
 
 
 class JobClient:
     """Client for submitting jobs to the distributed system"""
     
-    def __init__(self):
-        self.broker = RabbitMQClient()
-        self.config = BrokerConfig()
+    def __init__(self, pool: ConnectionPool = None):
+        self.pool = pool or get_pool()
+        self.config = self.pool.config
+        self._blob_store = None
         
-    def submit_job(self, job_type: str, params: dict, prefer_gpu: bool = True):
-        """Submit a job to the system"""
-        job_id = f"job-{uuid.uuid4().hex[:12]}"
+    @property
+    def blob_store(self) -> BlobStore:
+        """Blob store for job inputs and outputs (created on first use)"""
+        if self._blob_store is None:
+            self._blob_store = BlobStore()
+        return self._blob_store
         
+    def _build_job(self, job_type: str, params: dict, prefer_gpu: bool = True,
+                   priority: int = None, ttl: float = None, strict_device: bool = False,
+                   use_cache: bool = False, timeout: float = None) -> dict:
+        """Build the message for a single job, rejecting parameters its type doesn't accept"""
+        get_job_type(job_type).validate(params)
         job_data = {
-            'job_id': job_id,
+            'job_id': f"job-{uuid.uuid4().hex[:12]}",
             'job_type': job_type,
             'submit_time': datetime.now().isoformat(),
             'prefer_gpu': prefer_gpu,
             **params
         }
         
+        # Higher priority jobs overtake queued ones; expired jobs are never run
+        if priority is not None:
+            job_data['priority'] = priority
+        if ttl is not None:
+            job_data['deadline'] = deadline_from_ttl(ttl)
+        # Pin the job to the requested device instead of the least-loaded pool
+        if strict_device:
+            job_data['strict_device'] = True
+        # Allow the scheduler to answer with the result of an identical earlier job
+        if use_cache:
+            job_data['use_cache'] = True
+        # Workers stop the job once it has run this long
+        if timeout is not None:
+            job_data['timeout_s'] = timeout
+        return job_data
+        
+    def submit_job(self, job_type: str, params: dict, prefer_gpu: bool = True,
+                   priority: int = None, ttl: float = None, strict_device: bool = False,
+                   use_cache: bool = False, timeout: float = None):
+        """Submit a job to the system"""
+        job_data = self._build_job(job_type, params, prefer_gpu, priority, ttl, strict_device, use_cache,
+                                   timeout)
+        job_id = job_data['job_id']
+        
         print(f"\n📤 Submitting job {job_id}")
         print(f"   Type: {job_type}")
-        print(f"   Prefer GPU: {prefer_gpu}")
+        print(f"   Prefer GPU: {prefer_gpu}{' (strict)' if strict_device else ''}")
         print(f"   Parameters: {params}")
+        if priority is not None:
+            print(f"   Priority: {priority}")
+        if ttl is not None:
+            print(f"   Deadline: {job_data['deadline']}")
+        if timeout is not None:
+            print(f"   Timeout: {timeout}s")
+        if self.config.static_route(job_data) != 'scheduler':
+            print(f"   Route: direct to {self.config.static_route(job_data).upper()} queue")
+        
+        acked = self.pool.publish_routed([job_data])[0]
         
-        self.broker.connect()
-        self.broker.publish_job(job_data, self.config.job_queue)
-        self.broker.close()
+        if not acked:
+            raise RuntimeError(f"Job {job_id} was not confirmed by the broker")
         
         print(f"✓ Job submitted successfully!")
         return job_id
     
+    def submit_jobs(self, job_type: str, params_list: list, prefer_gpu: bool = True,
+                    priority: int = None, ttl: float = None, strict_device: bool = False,
+                    use_cache: bool = False, timeout: float = None):
+        """Submit a batch of jobs with a single confirmed publish
+        
+        Returns the ids of the jobs the broker confirmed.
+        """
+        jobs = [self._build_job(job_type, params, prefer_gpu, priority, ttl, strict_device, use_cache,
+                                timeout)
+                for params in params_list]
+        
+        print(f"\n📤 Submitting {len(jobs)} {job_type} jobs")
+        
+        acks = self.pool.publish_routed(jobs)
+        
+        job_ids = [job['job_id'] for job, acked in zip(jobs, acks) if acked]
+        print(f"✓ {len(job_ids)}/{len(jobs)} jobs confirmed")
+        return job_ids
+    
+    def cancel_job(self, job_id: str, reason: str = None) -> bool:
+        """Cancel a job wherever it is: skipped if still queued, stopped if running
+        
+        Cancellations are broadcast, not queued, so the scheduler and workers
+        must be running to hear them.
+        """
+        sent = self.pool.broadcast(cancel_message(job_id, reason), self.config.cancel_channel)
+        if sent:
+            print(f"🛑 Cancellation sent for job {job_id}")
+        return sent
+        
     def submit_matrix_multiply(self, size: int = 1000, iterations: int = 10, prefer_gpu: bool = True):
         """Submit a matrix multiplication job"""
         return self.submit_job('matrix_multiply', {
@@ -50,6 +125,15 @@ class JobClient:
             'iterations': iterations
         }, prefer_gpu)
     
+    def submit_matrix_multiply_data(self, a, b, iterations: int = 10, prefer_gpu: bool = True,
+                                    store_output: bool = False):
+        """Submit a matrix multiplication of real matrices passed through the blob store"""
+        return self.submit_job('matrix_multiply', {
+            'iterations': iterations,
+            'inputs': {'a': self.blob_store.put(a), 'b': self.blob_store.put(b)},
+            'store_output': store_output
+        }, prefer_gpu)
+        
     def submit_neural_network(self, epochs: int = 5, batch_size: int = 64, prefer_gpu: bool = True):
         """Submit a neural network training job"""
         return self.submit_job('neural_network', {
@@ -75,6 +159,22 @@ class JobClient:
             'image_size': image_size,
             'iterations': iterations
         }, prefer_gpu)
+        
+    def submit_image_processing_data(self, images, iterations: int = 50, prefer_gpu: bool = True,
+                                     store_output: bool = False):
+        """Submit image processing on a real [batch, 3, height, width] array via the blob store"""
+        return self.submit_job('image_processing', {
+            'iterations': iterations,
+            'inputs': {'images': self.blob_store.put(images)},
+            'store_output': store_output
+        }, prefer_gpu)
+        
+    def load_output(self, handle: dict, delete: bool = True):
+        """Read a job output from the blob store, removing the blob by default"""
+        array = self.blob_store.open(handle).copy()
+        if delete:
+            self.blob_store.delete(handle)
+        return array
 
 
 def main():
@@ -82,8 +182,8 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Submit jobs to the GPU cluster')
-    parser.add_argument('--job-type', type=str, required=True,
-                       choices=['matrix-multiply', 'neural-network', 'vector-add', 'image-processing'],
+    parser.add_argument('--job-type', type=str,
+                       choices=sorted(name.replace('_', '-') for name in job_types()),
                        help='Type of job to submit')
     parser.add_argument('--size', type=int, default=1000,
                        help='Size parameter for matrix/vector operations')
@@ -93,39 +193,71 @@ def main():
                        help='Number of epochs for neural network')
     parser.add_argument('--batch-size', type=int, default=64,
                        help='Batch size')
+    parser.add_argument('--dtype', type=str, default='float32', choices=list(DTYPES),
+                       help='Compute precision (errors are reported against float32)')
+    parser.add_argument('--memory-format', type=str, default='contiguous', choices=MEMORY_FORMATS,
+                       help='Tensor layout for image processing')
+    parser.add_argument('--autocast', action='store_true',
+                       help='Train the neural network with autocast mixed precision')
     parser.add_argument('--cpu', action='store_true',
                        help='Prefer CPU instead of GPU')
+    parser.add_argument('--strict-device', action='store_true',
+                       help='Run on the requested device even if the other pool is less loaded')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Random seed for the generated job data')
+    parser.add_argument('--cold-run', action='store_true',
+                       help='Allocate fresh inputs and modules instead of reusing cached ones')
+    parser.add_argument('--use-cache', action='store_true',
+                       help='Reuse the result of an identical earlier job if one is cached')
     parser.add_argument('--count', type=int, default=1,
                        help='Number of jobs to submit')
+    parser.add_argument('--priority', type=int, default=None,
+                       help='Job priority (0-10, higher runs first)')
+    parser.add_argument('--ttl', type=float, default=None,
+                       help='Seconds the job may wait before it expires unexecuted')
+    parser.add_argument('--timeout', type=float, default=None,
+                       help='Seconds the job may run before the worker stops it; counted from when '
+                            'execution starts and, except on CPU process engines, only checked '
+                            'between iterations')
+    parser.add_argument('--cancel', type=str, nargs='+', metavar='JOB_ID',
+                       help='Cancel submitted jobs instead of submitting one')
     
     args = parser.parse_args()
+    if not args.cancel and not args.job_type:
+        parser.error('--job-type is required unless --cancel is given')
     
     client = JobClient()
+    
+    if args.cancel:
+        for job_id in args.cancel:
+            client.cancel_job(job_id)
+        client.pool.close()
+        return
     prefer_gpu = not args.cpu
     
     print(f"\n{'='*60}")
     print(f"🚀 Job Submission Client")
     print(f"{'='*60}")
     
-    job_ids = []
-    
-    for i in range(args.count):
-        if args.count > 1:
-            print(f"\nSubmitting job {i+1}/{args.count}...")
-            
-        if args.job_type == 'matrix-multiply':
-            job_id = client.submit_matrix_multiply(args.size, args.iterations, prefer_gpu)
-        elif args.job_type == 'neural-network':
-            job_id = client.submit_neural_network(args.epochs, args.batch_size, prefer_gpu)
-        elif args.job_type == 'vector-add':
-            job_id = client.submit_vector_add(args.size, args.iterations, prefer_gpu)
-        elif args.job_type == 'image-processing':
-            job_id = client.submit_image_processing(args.batch_size, args.size, args.iterations, prefer_gpu)
-        
-        job_ids.append(job_id)
-        
-        if i < args.count - 1:
-            time.sleep(0.1)  # Small delay between submissions
+    # Options map onto job parameters through each type's declared schema
+    job_type = args.job_type.replace('-', '_')
+    params = {name: getattr(args, param.cli, param.default) if param.cli else param.default
+              for name, param in get_job_type(job_type).params.items()}
+    
+    if args.seed is not None:
+        params['seed'] = args.seed
+    if args.cold_run:
+        params['cold_run'] = True
+    
+    if args.count > 1:
+        # One confirmed batch over a pooled connection instead of a handshake per job
+        job_ids = client.submit_jobs(job_type, [params] * args.count, prefer_gpu,
+                                     args.priority, args.ttl, args.strict_device, args.use_cache, args.timeout)
+    else:
+        job_ids = [client.submit_job(job_type, params, prefer_gpu, args.priority, args.ttl,
+                                     args.strict_device, args.use_cache, args.timeout)]
+    
+    client.pool.close()
     
     print(f"\n{'='*60}")
     print(f"✅ All jobs submitted!")
@@ -15,6 +15,21 @@ CORS(app)
 
 RESULTS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'results', 'job_results.json')
 BENCHMARK_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'results', 'benchmark_config.json')
+PROGRESS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'results', 'job_progress.json')
+
+# Running jobs without a progress event for this long are shown as stalled
+PROGRESS_STALL_S = float(os.getenv('PROGRESS_STALL_S', '30'))
+
+_job_client = None
+
+
+def get_job_client():
+    """Return a JobClient shared across requests (backed by the broker connection pool)"""
+    global _job_client
+    if _job_client is None:
+        from client.submit_job import JobClient
+        _job_client = JobClient()
+    return _job_client
 
 
 def load_results():
@@ -57,6 +72,10 @@ def get_stats():
     total_jobs = len(results)
     successful_jobs = sum(1 for r in results if r.get('status') == 'completed')
     failed_jobs = sum(1 for r in results if r.get('status') == 'failed')
+    expired_jobs = sum(1 for r in results if r.get('status') == 'expired')
+    cancelled_jobs = sum(1 for r in results if r.get('status') == 'cancelled')
+    timed_out_jobs = sum(1 for r in results if r.get('status') == 'timed_out')
+    cache_hits = sum(1 for r in results if r.get('cache_hit'))
     
     # Get job types distribution
     job_types = {}
@@ -72,6 +91,10 @@ def get_stats():
         'total_jobs': total_jobs,
         'successful_jobs': successful_jobs,
         'failed_jobs': failed_jobs,
+        'expired_jobs': expired_jobs,
+        'cancelled_jobs': cancelled_jobs,
+        'timed_out_jobs': timed_out_jobs,
+        'cache_hits': cache_hits,
         'stats': stats,
         'job_types': job_types,
         'last_updated': datetime.now().isoformat()
@@ -167,21 +190,50 @@ def get_failed_jobs():
     return jsonify(failed)
 
 
+@app.route('/api/progress')
+def get_progress():
+    """Get progress of running jobs, flagging the ones that stopped reporting"""
+    try:
+        with open(PROGRESS_FILE, 'r') as f:
+            running = json.load(f).get('running', [])
+    except (OSError, ValueError):
+        running = []
+        
+    now = datetime.now()
+    for event in running:
+        try:
+            age = (now - datetime.fromisoformat(event['timestamp'])).total_seconds()
+        except (KeyError, ValueError):
+            age = 0
+        event['stalled'] = age > PROGRESS_STALL_S
+    running.sort(key=lambda event: event.get('job_id', ''))
+    return jsonify(running)
+
+
+@app.route('/api/job_types')
+def get_job_types():
+    """Get the registered job types with their parameter schemas"""
+    from broker.job_types import job_types
+    return jsonify({name: job_type.describe() for name, job_type in job_types().items()})
+
+
 @app.route('/api/submit_job', methods=['POST'])
 def submit_job():
     """Submit a new job"""
     try:
         from flask import request
-        sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-        from client.submit_job import JobClient
         
         data = request.get_json()
         job_type = data.get('job_type')
         params = data.get('params', {})
         prefer_gpu = data.get('prefer_gpu', True)
         
-        client = JobClient()
-        job_id = client.submit_job(job_type, params, prefer_gpu)
+        client = get_job_client()
+        job_id = client.submit_job(job_type, params, prefer_gpu,
+                                   data.get('priority'), data.get('ttl'),
+                                   data.get('strict_device', False),
+                                   data.get('use_cache', False),
+                                   data.get('timeout_s'))
         
         return jsonify({
             'success': True,
@@ -195,6 +247,30 @@ def submit_job():
         }), 500
 
 
+@app.route('/api/cancel_job', methods=['POST'])
+def cancel_job():
+    """Cancel a queued or running job"""
+    try:
+        from flask import request
+        
+        data = request.get_json()
+        job_id = data.get('job_id')
+        if not job_id:
+            return jsonify({'success': False, 'error': 'job_id is required'}), 400
+            
+        sent = get_job_client().cancel_job(job_id, data.get('reason'))
+        return jsonify({
+            'success': sent,
+            'job_id': job_id,
+            'message': f'Cancellation sent for job {job_id}' if sent else f'Could not send cancellation for {job_id}'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/run_benchmark', methods=['POST'])
 def run_benchmark():
     """Run a benchmark test"""
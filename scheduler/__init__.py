@@ -0,0 +1,3 @@
+"""
+Scheduler - Routes jobs from the main queue to worker pools
+"""
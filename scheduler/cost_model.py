@@ -0,0 +1,87 @@
+"""
+Cost Model - Online runtime prediction per job type and worker pool
+"""
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
+
+from broker.job_messages import job_work
+
+
+class RuntimeModel:
+    """Least-squares fit of runtime = overhead + seconds_per_gflop * gflops
+
+    Sums are exponentially decayed so the fit follows changes in the fleet
+    (new hardware, thermal throttling, contention) instead of averaging over
+    its whole history. The intercept captures fixed costs such as allocation
+    and host-to-device transfer, which is what makes small jobs cheaper on CPU.
+    """
+
+    def __init__(self, decay: float = 0.98):
+        self.decay = decay
+        self.samples = 0
+        self._n = self._sx = self._sy = self._sxx = self._sxy = 0.0
+
+    def update(self, gflops: float, runtime: float):
+        """Add one observed runtime"""
+        d = self.decay
+        self._n = self._n * d + 1
+        self._sx = self._sx * d + gflops
+        self._sy = self._sy * d + runtime
+        self._sxx = self._sxx * d + gflops * gflops
+        self._sxy = self._sxy * d + gflops * runtime
+        self.samples += 1
+
+    def predict(self, gflops: float) -> float:
+        """Predicted runtime in seconds"""
+        mean_x, mean_y = self._sx / self._n, self._sy / self._n
+        variance = self._sxx / self._n - mean_x * mean_x
+        if variance <= 1e-12 * max(1.0, mean_x * mean_x):
+            # Every sample had the same size: best guess is their mean
+            slope = 0.0
+        else:
+            slope = max(0.0, (self._sxy / self._n - mean_x * mean_y) / variance)
+        intercept = mean_y - slope * mean_x
+        return max(0.0, intercept + slope * gflops)
+
+
+class CostModel:
+    """Runtime models for every (job_type, worker_type) seen so far"""
+
+    def __init__(self, decay: float = None, min_samples: int = None):
+        self.decay = decay or float(os.getenv('COST_MODEL_DECAY', '0.98'))
+        self.min_samples = min_samples or int(os.getenv('COST_MODEL_MIN_SAMPLES', '3'))
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def observe(self, job_type: str, worker_type: str, work: float, runtime: float):
+        """Record how long a job of the given work took on a pool"""
+        with self._lock:
+            model = self._models.setdefault((job_type, worker_type), RuntimeModel(self.decay))
+            model.update(work / 1e9, runtime)
+
+    def predict(self, job_data: Dict[str, Any], worker_type: str) -> Optional[float]:
+        """Predicted runtime of a job on a pool, or None without enough history"""
+        with self._lock:
+            model = self._models.get((job_data.get('job_type'), worker_type))
+            if model is None or model.samples < self.min_samples:
+                return None
+            return model.predict(job_work(job_data) / 1e9)
+
+    def load_history(self, path: str) -> int:
+        """Seed the models from a results file written by the results monitor"""
+        try:
+            with open(path) as f:
+                results = json.load(f).get('results', [])
+        except (OSError, ValueError):
+            return 0
+
+        loaded = 0
+        for result in results:
+            if (result.get('status') == 'completed' and not result.get('cache_hit')
+                    and result.get('processing_time') is not None):
+                self.observe(result.get('job_type'), result.get('worker_type'),
+                             job_work(result), result['processing_time'])
+                loaded += 1
+        return loaded
@@ -3,37 +3,238 @@ Scheduler - Distributes jobs to GPU or CPU workers
 """
 import sys
 import os
+import time
+import threading
+from datetime import datetime
+from typing import Optional
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Ahead of this script's own directory, so `scheduler` resolves to the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from broker.broker_client import RabbitMQClient, BrokerConfig
+from broker.base import NonRetryableError
+from broker.broker_client import BrokerConfig, create_broker
+from broker.cancellation import CancellationListener
+from broker.job_messages import is_expired, expired_result, interrupted_result
+from broker.job_types import find_job_type
+from broker.result_cache import cache_key, create_result_cache, is_cacheable
+from scheduler.cost_model import CostModel
+from scheduler.worker_registry import WorkerRegistry
 
 
 class JobScheduler:
-    """Simple scheduler that routes jobs to GPU or CPU workers"""
+    """Scheduler that routes jobs to the GPU or CPU pool that finishes them first
+    
+    Workers report their load and recent job runtimes in heartbeats, consumed
+    on a separate connection into a WorkerRegistry and a CostModel. GPU jobs
+    go to whichever live pool has the lowest expected completion time (queue
+    wait plus predicted runtime), or the fewest queued plus in-flight jobs per
+    slot while a pool has no runtime history yet, unless they set
+    ``strict_device``. Jobs whose declared memory estimate exceeds the free
+    memory reported by the GPU pool go to the CPU pool.
+    """
     
     def __init__(self):
-        self.broker = RabbitMQClient()
+        self.broker = create_broker()
         self.config = BrokerConfig()
         self.jobs_scheduled = 0
+        self.jobs_expired = 0
+        self.jobs_rerouted = 0
+        self.jobs_cached = 0
+        self.jobs_cancelled = 0
+        self.cancellations = CancellationListener(self.config)
+        self.result_cache = create_result_cache(self.config)
+        
+        self.registry = WorkerRegistry(self.config.heartbeat_ttl)
+        self.heartbeat_broker = create_broker(self.config)
+        
+        # Runtime predictions, seeded from the results monitor's history
+        self.cost_model = CostModel()
+        history = os.getenv('COST_MODEL_HISTORY', os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results', 'job_results.json'))
+        seeded = self.cost_model.load_history(history)
+        
+        # Queue depths are polled at most this often and bumped locally in between
+        self.depth_refresh = float(os.getenv('SCHEDULER_DEPTH_REFRESH', '1'))
+        self._queue_depths = {}
+        self._depths_checked = 0.0
         
         print("🎛️  Job Scheduler initialized")
+        print(f"   Cost model seeded with {seeded} past results")
+        
+    def _on_heartbeat(self, heartbeat: dict):
+        """Learn from the runtimes a worker reports, then record its load"""
+        for sample in heartbeat.pop('samples', []):
+            self.cost_model.observe(sample['job_type'], heartbeat.get('worker_type'),
+                                    sample['work'], sample['runtime'])
+        self.registry.update(heartbeat)
+        
+    def _consume_heartbeats(self):
+        """Feed worker heartbeats into the registry (runs on its own thread)
+        
+        Reconnects after failures; until it does, worker entries go stale and
+        expire from the registry instead of steering routing with old load.
+        """
+        while True:
+            try:
+                self.heartbeat_broker.connect()
+                self.heartbeat_broker.consume(self.config.heartbeat_queue, self._on_heartbeat)
+                return
+            except Exception as e:
+                print(f"⚠️  Heartbeat consumer disconnected: {e}")
+                try:
+                    self.heartbeat_broker.close()
+                except Exception:
+                    pass
+                time.sleep(5)
+            
+    def _queue_depth(self, queue_name: str) -> int:
+        """Recent depth of a worker queue"""
+        now = time.monotonic()
+        if now - self._depths_checked > self.depth_refresh:
+            self._queue_depths = {queue: self.broker.queue_depth(queue)
+                                  for queue in (self.config.gpu_queue, self.config.cpu_queue)}
+            self._depths_checked = now
+        return self._queue_depths[queue_name]
+        
+    def _pool_load(self, worker_type: str, queue_name: str) -> Optional[float]:
+        """Queued plus in-flight jobs per execution slot, or None without live workers"""
+        stats = self.registry.pool_stats(worker_type)
+        if not stats['workers']:
+            return None
+        return (self._queue_depth(queue_name) + stats['in_flight']) / stats['slots']
+        
+    def expected_completion(self, job_data: dict, worker_type: str, queue_name: str) -> Optional[float]:
+        """Seconds until a job would finish on a pool, or None if unknown"""
+        stats = self.registry.pool_stats(worker_type)
+        runtime = self.cost_model.predict(job_data, worker_type)
+        if not stats['workers'] or runtime is None:
+            return None
+            
+        # Jobs that must finish before a slot frees up for this one
+        ahead = max(0, self._queue_depth(queue_name) + stats['in_flight'] + 1 - stats['slots'])
+        if stats['throughput'] > 0:
+            wait = ahead / stats['throughput']
+        else:
+            wait = ahead * runtime / stats['slots']
+        return wait + runtime
+        
+    def choose_pool(self, job_data: dict) -> str:
+        """Pick the worker pool ('gpu' or 'cpu') for a job"""
+        requested = 'gpu' if job_data.get('prefer_gpu', True) else 'cpu'
+        
+        # CPU and strict jobs go where they asked; until workers have had a
+        # chance to report, there is nothing to balance on either
+        if requested == 'cpu' or job_data.get('strict_device') or self.registry.warming_up():
+            return requested
+            
+        # Don't queue a job on GPUs that can't hold it
+        needed = find_job_type(job_data.get('job_type')).estimate_memory(job_data)
+        gpu_free = self.registry.pool_stats('gpu')['free_memory']
+        if needed is not None and gpu_free is not None and needed > gpu_free:
+            return 'cpu'
+            
+        gpu_eta = self.expected_completion(job_data, 'gpu', self.config.gpu_queue)
+        cpu_eta = self.expected_completion(job_data, 'cpu', self.config.cpu_queue)
+        if gpu_eta is not None and cpu_eta is not None:
+            return 'cpu' if cpu_eta < gpu_eta else 'gpu'
+            
+        # A pool without runtime history yet: balance on load alone
+        gpu_load = self._pool_load('gpu', self.config.gpu_queue)
+        cpu_load = self._pool_load('cpu', self.config.cpu_queue)
+        if gpu_load is None:
+            return 'cpu' if cpu_load is not None else 'gpu'
+        if cpu_load is not None and cpu_load < gpu_load:
+            return 'cpu'
+        return 'gpu'
+        
+    def _cached_result(self, job_data: dict) -> Optional[dict]:
+        """Result of an identical earlier job on an acceptable device, if cached"""
+        requested = 'gpu' if job_data.get('prefer_gpu', True) else 'cpu'
+        if requested == 'cpu' or job_data.get('strict_device'):
+            device_classes = [requested]
+        else:
+            device_classes = ['gpu', 'cpu']
+            
+        for device_class in device_classes:
+            cached = self.result_cache.get(cache_key(job_data, device_class))
+            if cached is not None:
+                return cached
+        return None
         
     def schedule_job(self, job_data: dict):
         """Schedule a job to the appropriate worker queue"""
         job_id = job_data.get('job_id', 'unknown')
-        prefer_gpu = job_data.get('prefer_gpu', True)
         
-        # Simple scheduling: prefer GPU if requested
-        target_queue = self.config.gpu_queue if prefer_gpu else self.config.cpu_queue
+        # No worker can run this job: send it straight to the dead-letter queue
+        job_type = find_job_type(job_data.get('job_type'))
+        if job_type is None:
+            raise NonRetryableError(f"Unknown job type: {job_data.get('job_type')}")
+        try:
+            job_type.validate(job_data)
+        except ValueError as e:
+            raise NonRetryableError(f"Invalid {job_type.name} job: {e}")
+        
+        # Don't forward jobs that can no longer meet their deadline
+        if is_expired(job_data):
+            print(f"\n⌛ Job {job_id} expired before scheduling")
+            if not self.broker.publish_result(expired_result(job_data, 'scheduler', 'scheduler')):
+                raise RuntimeError(f"Expiry result for job {job_id} was not confirmed")
+            self.jobs_expired += 1
+            return
+            
+        # Jobs cancelled while waiting here never reach a worker queue
+        if self.cancellations.is_cancelled(job_id):
+            print(f"\n🛑 Job {job_id} cancelled before scheduling")
+            cancelled = interrupted_result(job_data, 'scheduler', 'scheduler', 'cancelled',
+                                           'Job was cancelled before it was scheduled', 0)
+            if not self.broker.publish_result(cancelled):
+                raise RuntimeError(f"Cancellation result for job {job_id} was not confirmed")
+            self.jobs_cancelled += 1
+            return
+            
+        # Answer repeated jobs from the cache without using a worker
+        cached = self._cached_result(job_data) if self.result_cache and is_cacheable(job_data) else None
+        if cached is not None:
+            print(f"\n♻️  Job {job_id} answered from the result cache")
+            # Nothing ran for this job: drop the start time of the run that was cached
+            cached.pop('start_time', None)
+            cached.update({
+                'job_id': job_id,
+                'status': 'completed',
+                'cache_hit': True,
+                'priority': job_data.get('priority'),
+                'submit_time': job_data.get('submit_time'),
+                'end_time': datetime.now().isoformat(),
+                'processing_time': 0
+            })
+            if not self.broker.publish_result(cached):
+                raise RuntimeError(f"Cached result for job {job_id} was not confirmed")
+            self.jobs_cached += 1
+            return
+            
+        pool = self.choose_pool(job_data)
+        target_queue = self.config.gpu_queue if pool == 'gpu' else self.config.cpu_queue
+        rerouted = pool == 'cpu' and job_data.get('prefer_gpu', True)
+        predicted = self.cost_model.predict(job_data, pool)
+        if predicted is not None:
+            job_data['predicted_runtime'] = predicted
         
         print(f"\n📋 Scheduling job {job_id}")
         print(f"   Type: {job_data.get('job_type')}")
-        print(f"   Target: {'GPU' if prefer_gpu else 'CPU'} queue")
+        print(f"   Priority: {job_data.get('priority', 0)}")
+        print(f"   Target: {pool.upper()} queue{' (rerouted from GPU)' if rerouted else ''}")
+        if predicted is not None:
+            print(f"   Predicted runtime: {predicted:.4f}s")
         
-        # Forward to appropriate worker queue
-        self.broker.publish_job(job_data, target_queue)
+        # Forward to appropriate worker queue; raising leaves the job unacked
+        if not self.broker.publish_many([job_data], target_queue)[0]:
+            raise RuntimeError(f"Forwarding job {job_id} to {target_queue} was not confirmed")
         
+        # Count it until the next depth poll so bursts don't all pick the same pool
+        if target_queue in self._queue_depths:
+            self._queue_depths[target_queue] += 1
+        if rerouted:
+            self.jobs_rerouted += 1
         self.jobs_scheduled += 1
         print(f"✓ Job scheduled (total: {self.jobs_scheduled})")
         
@@ -44,10 +245,16 @@ class JobScheduler:
         
         try:
             self.broker.connect()
+            self.cancellations.start()
+            threading.Thread(target=self._consume_heartbeats, name='heartbeats', daemon=True).start()
             self.broker.consume(self.config.job_queue, self.schedule_job)
         except KeyboardInterrupt:
             print(f"\n👋 Scheduler shutting down...")
             print(f"   Jobs scheduled: {self.jobs_scheduled}")
+            print(f"   Jobs expired: {self.jobs_expired}")
+            print(f"   Jobs moved to CPU: {self.jobs_rerouted}")
+            print(f"   Jobs answered from cache: {self.jobs_cached}")
+            print(f"   Jobs cancelled: {self.jobs_cancelled}")
         except Exception as e:
             import traceback
             print(f"❌ Error: {e}")
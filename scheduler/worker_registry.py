@@ -0,0 +1,50 @@
+"""
+Worker Registry - Live view of the worker fleet built from heartbeats
+"""
+import threading
+import time
+from typing import Dict, Any, List
+
+
+class WorkerRegistry:
+    """Tracks the latest heartbeat of every worker and aggregates per pool"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.started_at = time.time()
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def update(self, heartbeat: Dict[str, Any]):
+        """Record a worker heartbeat"""
+        heartbeat.setdefault('timestamp', time.time())
+        with self._lock:
+            self._workers[heartbeat['worker_id']] = heartbeat
+
+    def warming_up(self) -> bool:
+        """True until every live worker has had a chance to report once"""
+        return time.time() - self.started_at < self.ttl
+
+    def live_workers(self, worker_type: str = None) -> List[Dict[str, Any]]:
+        """Workers whose last heartbeat is within the TTL, dropping stale ones"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for worker_id in [w for w, hb in self._workers.items() if hb['timestamp'] < cutoff]:
+                del self._workers[worker_id]
+            workers = list(self._workers.values())
+
+        if worker_type:
+            workers = [w for w in workers if w.get('worker_type') == worker_type]
+        return workers
+
+    def pool_stats(self, worker_type: str) -> Dict[str, Any]:
+        """Aggregate load of the live workers of one type, leaving out draining ones"""
+        workers = [w for w in self.live_workers(worker_type) if not w.get('draining')]
+        return {
+            'workers': len(workers),
+            'slots': sum(w.get('slots', 1) for w in workers),
+            'in_flight': sum(w.get('in_flight', 0) for w in workers),
+            'throughput': sum(w.get('throughput', 0.0) for w in workers),
+            'free_memory': min((w.get('free_memory') for w in workers if w.get('free_memory') is not None),
+                               default=None)
+        }
@@ -0,0 +1,394 @@
+"""
+Execution Engines - Where a worker's job slots actually run
+"""
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+import torch
+
+from broker.cancellation import CancelToken, JobCancelled, JobTimedOut
+from broker.job_messages import job_work
+from workers.jobs.job_executor import JobExecutor
+
+
+class ThreadEngine:
+    """Runs jobs on the calling slot thread
+
+    On GPU every slot thread gets its own CUDA stream, so kernels from
+    concurrent slots can overlap instead of serializing on the default stream.
+    """
+
+    def __init__(self, executor: JobExecutor, on_progress: Callable[[Dict[str, Any]], None] = None):
+        self.executor = executor
+        self.executor.progress_sink = on_progress
+        self._local = threading.local()
+
+    def _stream(self):
+        """This thread's CUDA stream"""
+        if not hasattr(self._local, 'stream'):
+            self._local.stream = torch.cuda.Stream(device=self.executor.device)
+        return self._local.stream
+
+    def warm(self):
+        """Create the CUDA context up front instead of on the first job"""
+        if self.executor.use_gpu:
+            torch.zeros(1, device=self.executor.device)
+            torch.cuda.synchronize(self.executor.device)
+
+    def execute(self, job_data: Dict[str, Any], token: CancelToken = None) -> Dict[str, Any]:
+        """Execute a single job; token is only checked cooperatively
+
+        A job stuck inside one iteration cannot be stopped on a thread, so
+        its timeout only takes effect at the next iteration boundary.
+        """
+        if token:
+            token.start()
+        if not self.executor.use_gpu:
+            return self.executor.execute(job_data, token)
+        with torch.cuda.stream(self._stream()):
+            return self.executor.execute(job_data, token)
+
+    def execute_batch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute a coalesced batch"""
+        if not self.executor.use_gpu:
+            return self.executor.execute_batch(jobs)
+        with torch.cuda.stream(self._stream()):
+            return self.executor.execute_batch(jobs)
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Counters and usage of the executor's tensor cache"""
+        return self.executor.tensor_cache.stats()
+
+    def close(self):
+        """Nothing to release"""
+
+
+# Executor owned by each engine process, and the stop flags and job pids shared with the worker
+_process_executor = None
+_stop_flags = None
+_job_pids = None
+
+
+class _FlagToken(CancelToken):
+    """Engine-process view of a job's token: cancelled once the worker raises its flag"""
+
+    def __init__(self, flag: int, deadline: Optional[float]):
+        super().__init__()
+        self.flag = flag
+        self.deadline = deadline
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(_stop_flags[self.flag])
+
+
+def _init_process(stop_flags, job_pids, progress_events):
+    """Create the executor of a CPU engine process"""
+    global _process_executor, _stop_flags, _job_pids
+    _stop_flags = stop_flags
+    _job_pids = job_pids
+    # Partitions are sized with intra-op threads; keep inter-op from adding more
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _process_executor = JobExecutor(use_gpu=False)
+    if progress_events is not None:
+        _process_executor.progress_sink = progress_events.put
+
+
+def _ready() -> int:
+    """No-op run by warm() so every engine process starts and initializes"""
+    return os.getpid()
+
+
+def _pin(cores: List[int]):
+    """Restrict this process and torch's intra-op pool to a partition"""
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+
+
+def _execute(job_data: Dict[str, Any], cores: List[int], control: Optional[Tuple[int, float]]) -> Dict[str, Any]:
+    """Execute a job in an engine process; control is (stop flag, deadline) if it can be stopped"""
+    _pin(cores)
+    token = None
+    if control:
+        # Tell the worker which process to kill if the job ignores its stop flag
+        _job_pids[control[0]] = os.getpid()
+        token = _FlagToken(*control)
+    return _process_executor.execute(job_data, token)
+
+
+def _execute_batch(jobs: List[Dict[str, Any]], cores: List[int], control=None) -> List[Dict[str, Any]]:
+    """Execute a coalesced batch in an engine process (batches are not stoppable)"""
+    _pin(cores)
+    return _process_executor.execute_batch(jobs)
+
+
+def _parse_cores(spec: str) -> List[int]:
+    """Cores from a list like '0-3,8,10-11'"""
+    cores = []
+    for part in spec.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            cores.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            cores.append(int(part))
+    return cores
+
+
+class CorePartitioner:
+    """Hands out disjoint core sets sized to each job
+
+    The cores are split into ``partitions`` equal units, the narrowest
+    layout. A job gets a power-of-two number of adjacent units (aligned, so
+    freed units merge back cleanly): one for small jobs, more for jobs with
+    more than CPU_GFLOPS_PER_CORE of work per core. Requests are served in
+    arrival order so wide jobs are not starved by a stream of narrow ones.
+    """
+
+    def __init__(self, cores: List[int], partitions: int, max_cores: int, gflops_per_core: float):
+        self.partitions = max(1, min(partitions, len(cores)))
+        self.width = len(cores) // self.partitions
+        self.units = [cores[i * self.width:(i + 1) * self.width] for i in range(self.partitions)]
+        self.max_units = max(1, min(self.partitions, max_cores // self.width))
+        self.gflops_per_core = gflops_per_core
+        self._free = [True] * self.partitions
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+    def units_for(self, work: float) -> int:
+        """Number of units for a job of the given FLOPs"""
+        wanted_cores = work / 1e9 / self.gflops_per_core
+        units = 1
+        while units * 2 <= self.max_units and units * self.width < wanted_cores:
+            units *= 2
+        return units
+
+    def _find(self, units: int):
+        """First free aligned run of units, or None"""
+        for start in range(0, self.partitions - units + 1, units):
+            if all(self._free[start:start + units]):
+                return start
+        return None
+
+    def acquire(self, units: int) -> Tuple[int, List[int]]:
+        """Block until a run of units is free; returns (first unit, cores)"""
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while self._serving != ticket or self._find(units) is None:
+                self._cond.wait()
+            start = self._find(units)
+            self._free[start:start + units] = [False] * units
+            self._serving += 1
+            self._cond.notify_all()
+        return start, [core for unit in self.units[start:start + units] for core in unit]
+
+    def release(self, start: int, units: int):
+        """Return units to the pool"""
+        with self._cond:
+            self._free[start:start + units] = [True] * units
+            self._cond.notify_all()
+
+
+class ProcessEngine:
+    """Runs CPU jobs in a pool of executor processes pinned to disjoint cores
+
+    Slot threads only wait on the process that does the work, so several
+    jobs make progress at once without sharing the GIL. Each job runs pinned
+    to a partition from CorePartitioner with a matching torch thread count,
+    so slots (and workers given disjoint CPU_CORES on one host) don't
+    oversubscribe cores. Processes are not forked from the worker, so they
+    don't inherit its broker connections and threads: by default they fork
+    from a forkserver template that has already imported torch and the
+    executor (CPU_ENGINE_START_METHOD, spawn where unavailable), so neither
+    startup nor a pool restart pays for those imports again.
+
+    Cancellation reaches a job through a flag in shared memory that the
+    executor checks between iterations. A job still running CANCEL_GRACE_S
+    after it was cancelled or timed out is stopped by killing the pool; jobs
+    that were running next to it are resubmitted to the new pool.
+    """
+
+    def __init__(self, slots: int, on_progress: Callable[[Dict[str, Any]], None] = None):
+        if os.getenv('CPU_CORES'):
+            cores = _parse_cores(os.getenv('CPU_CORES'))
+        elif hasattr(os, 'sched_getaffinity'):
+            cores = sorted(os.sched_getaffinity(0))
+        else:
+            cores = list(range(os.cpu_count() or 1))
+
+        self.partitioner = CorePartitioner(
+            cores,
+            partitions=int(os.getenv('CPU_PARTITIONS', str(slots))),
+            max_cores=int(os.getenv('CPU_PARTITION_MAX_CORES', str(len(cores)))),
+            gflops_per_core=float(os.getenv('CPU_GFLOPS_PER_CORE', '2'))
+        )
+        self.slots = slots
+        self.grace = float(os.getenv('CANCEL_GRACE_S', '5'))
+        methods = multiprocessing.get_all_start_methods()
+        method = os.getenv('CPU_ENGINE_START_METHOD', 'forkserver' if 'forkserver' in methods else 'spawn')
+        self._context = multiprocessing.get_context(method)
+        if method == 'forkserver':
+            self._context.set_forkserver_preload([__name__])
+        # One stop flag per job that can be running or waiting on a process
+        flags = slots + self.partitioner.partitions
+        self._stop_flags = self._context.Array('b', flags, lock=False)
+        self._job_pids = self._context.Array('i', flags, lock=False)
+        self._free_flags = queue.Queue()
+        self._flags_lock = threading.Lock()
+        for flag in range(flags):
+            self._free_flags.put(flag)
+        self._pool_lock = threading.Lock()
+        # Progress events come back from the processes over a queue
+        self._progress_events = self._context.Queue() if on_progress else None
+        if on_progress:
+            threading.Thread(target=self._forward_progress, args=(on_progress,),
+                             name='engine-progress', daemon=True).start()
+        self.pool = self._new_pool()
+        print(f"   CPU layout: {self.partitioner.partitions} partitions x {self.partitioner.width} cores")
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """Start the engine processes"""
+        return ProcessPoolExecutor(max_workers=self.slots, mp_context=self._context,
+                                   initializer=_init_process,
+                                   initargs=(self._stop_flags, self._job_pids, self._progress_events))
+
+    def warm(self):
+        """Start every engine process now rather than on the first jobs"""
+        for future in [self.pool.submit(_ready) for _ in range(self.slots)]:
+            future.result()
+
+    def _forward_progress(self, on_progress: Callable[[Dict[str, Any]], None]):
+        """Hand progress events from the engine processes to on_progress until close()"""
+        while True:
+            event = self._progress_events.get()
+            if event is None:
+                return
+            on_progress(event)
+
+    def _restart_pool(self, broken: ProcessPoolExecutor, stuck_pid: int = 0):
+        """Replace a pool, first killing the process of a stuck job, unless that already happened
+
+        Killing one process breaks the pool, which then stops its other
+        processes itself; the jobs they were running are resubmitted.
+        """
+        with self._pool_lock:
+            if self.pool is not broken:
+                return
+            if stuck_pid:
+                try:
+                    os.kill(stuck_pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+                except ProcessLookupError:
+                    pass
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._new_pool()
+
+    def _wait(self, pool: ProcessPoolExecutor, future, token: Optional[CancelToken], flag: Optional[int]):
+        """Result of a submitted job, killing its pool if it ignores a stop request"""
+        while True:
+            hard_stop = token.hard_stop_at(self.grace) if token else None
+            try:
+                if hard_stop is None:
+                    # Poll so a cancellation that arrives later is noticed
+                    return future.result(timeout=None if token is None else 0.5)
+                return future.result(timeout=max(0.0, min(0.5, hard_stop - time.time())))
+            except TimeoutError:
+                if hard_stop is not None and time.time() >= hard_stop:
+                    print(f"💀 Job did not stop within {self.grace:.0f}s, restarting engine processes")
+                    # No pid yet means the job never started; replacing the pool drops it
+                    self._restart_pool(pool, self._job_pids[flag])
+                    if token.cancelled:
+                        raise JobCancelled("Job was cancelled (engine process killed)")
+                    raise JobTimedOut("Job exceeded its timeout (engine process killed)")
+
+    def _run(self, fn, payload, work: float, token: CancelToken = None):
+        """Run fn(payload, cores, control) on a partition sized for work; returns (result, layout)"""
+        units = self.partitioner.units_for(work)
+        start, cores = self.partitioner.acquire(units)
+        flag = self._free_flags.get() if token else None
+        owned = [True]
+
+        def raise_flag():
+            with self._flags_lock:
+                # The flag may already have been handed to another job
+                if owned[0]:
+                    self._stop_flags[flag] = 1
+
+        try:
+            control = None
+            if token:
+                # The partition is free now, so the job's timeout starts here
+                token.start()
+                self._stop_flags[flag] = 0
+                self._job_pids[flag] = 0
+                token.on_cancel(raise_flag)
+                control = (flag, token.deadline)
+            while True:
+                pool = self.pool
+                try:
+                    result = self._wait(pool, pool.submit(fn, payload, cores, control), token, flag)
+                    break
+                except BrokenProcessPool:
+                    if pool is self.pool:
+                        # A process died on its own: replace the pool but report this job's failure
+                        self._restart_pool(pool)
+                        raise
+                    # The pool was killed to stop a different job; run this one again
+        finally:
+            if flag is not None:
+                with self._flags_lock:
+                    owned[0] = False
+                self._free_flags.put(flag)
+            self.partitioner.release(start, units)
+        layout = {
+            'cores': cores,
+            'threads': len(cores),
+            'partition_units': units,
+            'layout': f"{self.partitioner.partitions}x{self.partitioner.width}"
+        }
+        return result, layout
+
+    def execute(self, job_data: Dict[str, Any], token: CancelToken = None) -> Dict[str, Any]:
+        """Execute a single job in a free process"""
+        result, layout = self._run(_execute, job_data, job_work(job_data), token)
+        result['cpu_partition'] = layout
+        return result
+
+    def execute_batch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute a coalesced batch in a free process"""
+        results, layout = self._run(_execute_batch, jobs, sum(job_work(job) for job in jobs))
+        for result in results:
+            result['cpu_partition'] = layout
+        return results
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """None: each engine process has its own tensor cache"""
+        return None
+
+    def close(self):
+        """Stop the engine processes"""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        if self._progress_events is not None:
+            self._progress_events.put(None)
+
+
+def create_engine(executor: JobExecutor, slots: int, on_progress: Callable[[Dict[str, Any]], None] = None):
+    """Process slots for CPU workers (CPU_ENGINE, default with more than one slot), threads otherwise
+
+    on_progress receives the executor's progress events, wherever it runs.
+    """
+    engine = os.getenv('CPU_ENGINE', 'process' if slots > 1 else 'thread').lower()
+    if not executor.use_gpu and engine == 'process':
+        return ProcessEngine(slots, on_progress)
+    return ThreadEngine(executor, on_progress)
@@ -0,0 +1,79 @@
+"""
+Heartbeat - Periodic worker status reports for the scheduler
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+
+import psutil
+
+from broker.broker_client import BrokerConfig, create_broker
+
+
+def free_memory(device) -> Optional[int]:
+    """Free bytes on the device (torch.device or name) a worker executes on"""
+    if str(device).startswith('cuda'):
+        import torch
+        return torch.cuda.mem_get_info(torch.device(device))[0]
+    return psutil.virtual_memory().available
+
+
+class ThroughputMeter:
+    """Jobs completed per second over a sliding window"""
+
+    def __init__(self, window: float = 60.0):
+        self.window = window
+        self._completions = deque()
+        self._lock = threading.Lock()
+
+    def record(self):
+        """Record one completed job"""
+        with self._lock:
+            self._completions.append(time.monotonic())
+
+    def rate(self) -> float:
+        """Completions per second over the window"""
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            while self._completions and self._completions[0] < cutoff:
+                self._completions.popleft()
+            return len(self._completions) / self.window
+
+
+class HeartbeatPublisher:
+    """Publishes a worker's status on its own connection from a background thread"""
+
+    def __init__(self, payload_fn: Callable[[], Dict[str, Any]], config: BrokerConfig = None):
+        self.config = config or BrokerConfig()
+        self.payload_fn = payload_fn
+        self.broker = create_broker(self.config)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start publishing every heartbeat_interval seconds"""
+        self._thread = threading.Thread(target=self._run, name='heartbeat', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Heartbeat loop; failures are logged and retried on the next beat"""
+        while not self._stop.is_set():
+            try:
+                heartbeat = self.payload_fn()
+                heartbeat['timestamp'] = time.time()
+                self.broker.publish_many([heartbeat], self.config.heartbeat_queue)
+            except Exception as e:
+                print(f"⚠️  Heartbeat failed: {e}")
+                try:
+                    self.broker.close()
+                except Exception:
+                    pass
+            self._stop.wait(self.config.heartbeat_interval)
+
+    def stop(self):
+        """Stop publishing and close the connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.config.heartbeat_interval + 1)
+        self.broker.close()
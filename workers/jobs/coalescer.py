@@ -0,0 +1,126 @@
+"""
+Job Coalescer - Run compatible small jobs as one batched execution
+"""
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Optional
+
+from broker.cancellation import CancelToken
+from broker.job_types import find_job_type
+
+
+def batch_key(job_data: Dict[str, Any]) -> Optional[tuple]:
+    """Jobs with equal keys can share one batched execution; None if not batchable"""
+    # Jobs with their own input tensors or random seed run as they are, and so
+    # do jobs with a timeout, which a batch could not enforce for them alone
+    if job_data.get('inputs') or job_data.get('seed') is not None or job_data.get('timeout_s'):
+        return None
+
+    job_type = find_job_type(job_data.get('job_type'))
+    if job_type is None or not job_type.batchable:
+        return None
+    # A batch runs in the first job's allocation mode, so jobs only share one if they agree on it
+    modes = (bool(job_data.get('cold_run')), job_data.get('preallocate'))
+    return (job_type.name,) + modes + job_type.batch_key(job_data)
+
+
+class _Batch:
+    """Jobs collected under one key, executed by the thread that opened it"""
+
+    def __init__(self):
+        self.jobs = []
+        self.tokens = []
+        self.futures = []
+        self.full = threading.Event()
+
+
+class JobCoalescer:
+    """Groups compatible jobs arriving on concurrent callback threads
+
+    The first job with a given key opens a batch and waits up to
+    ``max_wait_ms`` for others to join (or for the batch to fill). It then runs
+    them all through ``execute_batch`` and hands each waiting thread its own
+    result, so every job is still acked and reported individually.
+
+    More threads than ``slots`` may wait here for a batch to form, but at
+    most ``slots`` jobs or batches execute at once.
+    """
+
+    def __init__(self, execute: Callable[..., Dict[str, Any]],
+                 execute_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                 max_batch: int = None, max_wait_ms: float = None, slots: int = None):
+        self.execute = execute
+        self.execute_batch = execute_batch
+        self.max_batch = max_batch or int(os.getenv('COALESCE_MAX_BATCH', '1'))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else float(os.getenv('COALESCE_MAX_WAIT_MS', '5'))) / 1000
+        self._slots = threading.Semaphore(slots) if slots else None
+        self._open = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _slot(self):
+        """Hold an execution slot while running a job or batch"""
+        if self._slots is None:
+            yield
+            return
+        with self._slots:
+            yield
+
+    @property
+    def enabled(self) -> bool:
+        """True if jobs may be batched at all"""
+        return self.max_batch > 1
+
+    def run(self, job_data: Dict[str, Any], token: CancelToken = None) -> Dict[str, Any]:
+        """Execute a job, batched with compatible concurrent ones where possible
+
+        The token stops the job only if it ends up running on its own; a
+        cancelled job in a batch finishes with the rest of the batch.
+        """
+        key = batch_key(job_data) if self.enabled else None
+        if key is None:
+            with self._slot():
+                return self.execute(job_data, token)
+
+        future = Future()
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            batch.jobs.append(job_data)
+            batch.tokens.append(token)
+            batch.futures.append(future)
+            if len(batch.jobs) >= self.max_batch:
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                # Close the batch so late arrivals open a new one
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._execute(batch)
+
+        return future.result()
+
+    def _execute(self, batch: _Batch):
+        """Run a closed batch and resolve its futures"""
+        try:
+            with self._slot():
+                if len(batch.jobs) == 1:
+                    results = [self.execute(batch.jobs[0], batch.tokens[0])]
+                else:
+                    print(f"📦 Coalesced {len(batch.jobs)} {batch.jobs[0].get('job_type')} jobs")
+                    results = self.execute_batch(batch.jobs)
+        except Exception as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
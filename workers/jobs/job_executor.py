@@ -3,13 +3,29 @@ Job definitions for GPU/CPU execution
 """
 import torch
 import numpy as np
+import copy
+import functools
+import math
+import os
+import threading
 import time
-from typing import Dict, Any
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from broker.blob_store import BlobStore
+from broker.cancellation import CancelToken
+from broker.job_types import DTYPES, MEMORY_FORMATS, get_job_type
+from workers.jobs.tensor_cache import create_tensor_cache
+from workers.jobs.timing import JobTimer, peak_rss, reset_peak_rss
 
 
 class JobExecutor:
     """Base class for job execution"""
     
+    # The profiler is process-wide: concurrent slots must not profile at once
+    _profiler_lock = threading.Lock()
+    
     def __init__(self, use_gpu: bool = False):
         self.use_gpu = use_gpu and torch.cuda.is_available()
         self.device = torch.device('cuda' if self.use_gpu else 'cpu')
@@ -18,64 +34,470 @@ class JobExecutor:
             print(f"✓ GPU available: {torch.cuda.get_device_name(0)}")
         else:
             print("✓ Using CPU")
+            
+        self._blob_store = None
+        self.tensor_cache = create_tensor_cache()
+        self._cache_usage = threading.local()
+        self._current_job = threading.local()
+        
+        # Set by the engine to receive progress events; PROGRESS_INTERVAL=0 disables them
+        self.progress_sink = None
+        self.progress_interval = float(os.getenv('PROGRESS_INTERVAL', '1'))
+        self.preallocate = os.getenv('EXECUTOR_PREALLOCATE', '1').lower() in ('1', 'true', 'yes')
+        # Off by default: on CPU it profiles an extra step under a process-wide lock
+        self.track_allocations = os.getenv('TRACK_ALLOCATIONS', '0').lower() in ('1', 'true', 'yes')
+        
+    @property
+    def blob_store(self) -> BlobStore:
+        """Blob store for out-of-band job inputs and outputs (created on first use)"""
+        if self._blob_store is None:
+            self._blob_store = BlobStore()
+        return self._blob_store
+        
+    def _input_tensor(self, job_data: Dict[str, Any], name: str) -> Optional[torch.Tensor]:
+        """Map a job input referenced by blob handle, or None if it was not supplied"""
+        handle = job_data.get('inputs', {}).get(name)
+        if handle is None:
+            return None
+            
+        # Zero-copy on CPU; a single host-to-device copy on GPU
+        return torch.from_numpy(self.blob_store.open(handle)).to(self.device)
+        
+    def _store_output(self, job_data: Dict[str, Any], tensor: torch.Tensor) -> Optional[Dict[str, Any]]:
+        """Write a result tensor to the blob store if the job asked for it"""
+        if not job_data.get('store_output'):
+            return None
+        if tensor.dtype == torch.bfloat16:
+            # numpy (and so the blob store) has no bfloat16
+            tensor = tensor.float()
+            
+        handle, mapped = self.blob_store.allocate(tuple(tensor.shape), str(tensor.dtype).replace('torch.', ''))
+        torch.from_numpy(mapped).copy_(tensor.detach())
+        mapped.flush()
+        return handle
     
-    def execute(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a job based on its type"""
-        job_type = job_data.get('job_type')
-        
-        if job_type == 'matrix_multiply':
-            return self.matrix_multiply(job_data)
-        elif job_type == 'neural_network':
-            return self.neural_network_training(job_data)
-        elif job_type == 'vector_add':
-            return self.vector_addition(job_data)
-        elif job_type == 'image_processing':
-            return self.image_processing(job_data)
-        else:
-            raise ValueError(f"Unknown job type: {job_type}")
+    def _warm(self, job_data: Dict[str, Any]) -> bool:
+        """True if a job may reuse cached buffers and modules
+        
+        Seeded jobs always build fresh ones so their data depends only on the
+        seed; ``cold_run`` forces the same for benchmarking allocation costs.
+        """
+        return (self.tensor_cache.enabled and not job_data.get('cold_run')
+                and job_data.get('seed') is None)
+                
+    def _cached(self, job_data: Dict[str, Any], key: tuple, build: Callable[[], Any]) -> Any:
+        """Shared cached value for warm jobs, a freshly built one otherwise"""
+        if not self._warm(job_data):
+            return build()
+        value, hit = self.tensor_cache.get(key + (str(self.device),), build)
+        self._count_cache(hit)
+        return value
+        
+    def _checkout(self, job_data: Dict[str, Any], key: tuple, build: Callable[[], Any]):
+        """Cached value the job may mutate, returned to the cache when the job ends
+        
+        Returns (value, hit); cold jobs get a new value that is not kept.
+        """
+        if not self._warm(job_data):
+            return build(), False
+        key = key + (str(self.device),)
+        value, hit = self.tensor_cache.checkout(key, build)
+        self._count_cache(hit)
+        self._cache_usage.__dict__.setdefault('checked_out', []).append((key, value))
+        return value, hit
+        
+    def _checkin_all(self):
+        """Return everything the job on this thread checked out"""
+        for key, value in self._cache_usage.__dict__.pop('checked_out', []):
+            self.tensor_cache.checkin(key, value)
+            
+    def _count_cache(self, hit: bool):
+        """Tally a cache lookup for the job running on this thread"""
+        usage = self._cache_usage.__dict__
+        usage['hits' if hit else 'misses'] = usage.get('hits' if hit else 'misses', 0) + 1
+        
+    def _randn(self, job_data: Dict[str, Any], name: str, *shape: int) -> torch.Tensor:
+        """Random input tensor, shared by warm jobs of the same shape"""
+        return self._cached(job_data, ('randn', name, shape, torch.float32),
+                            lambda: torch.randn(*shape, device=self.device, generator=self._generator()))
+                            
+    def _generator(self) -> Optional[torch.Generator]:
+        """Random generator of the seeded job on this thread, None for unseeded jobs"""
+        return self._current_job.__dict__.get('generator')
+        
+    def _init_weights(self, module: torch.nn.Module) -> torch.nn.Module:
+        """Redraw a new module's default initialisation from the seeded job's generator
+        
+        Layers initialise from the global RNG, which concurrent jobs share;
+        this draws the same uniform(-1/sqrt(fan_in), 1/sqrt(fan_in)) values
+        from the job's own generator instead.
+        """
+        generator = self._generator()
+        if generator is None:
+            return module
+        with torch.no_grad():
+            for layer in module.modules():
+                weight = getattr(layer, 'weight', None)
+                if not isinstance(weight, torch.Tensor) or weight.dim() < 2:
+                    continue
+                bound = 1 / math.sqrt(weight[0].numel())
+                weight.uniform_(-bound, bound, generator=generator)
+                if layer.bias is not None:
+                    layer.bias.uniform_(-bound, bound, generator=generator)
+        return module
+        
+    def _dtype(self, job_data: Dict[str, Any]) -> torch.dtype:
+        """Compute precision the job asked for with ``dtype`` (float32 by default)"""
+        name = job_data.get('dtype', 'float32')
+        if name not in DTYPES:
+            raise ValueError(f"Unsupported dtype {name!r}, expected one of {', '.join(DTYPES)}")
+        return getattr(torch, name)
+        
+    @contextmanager
+    def _precision_support(self, dtype: torch.dtype):
+        """Report kernels this build lacks for a reduced precision as a job error"""
+        try:
+            yield
+        except RuntimeError as e:
+            if dtype != torch.float32 and 'not implemented' in str(e):
+                raise ValueError(f"{str(dtype).replace('torch.', '')} is not supported on {self.device}: {e}") from e
+            raise
+            
+    @staticmethod
+    def _numerical_error(reference: torch.Tensor, value: torch.Tensor) -> Dict[str, float]:
+        """Max absolute and relative L2 error of a result against its float32 reference"""
+        difference = value.float() - reference.float()
+        return {
+            'max_abs': difference.abs().max().item(),
+            'rel_l2': (difference.norm() / reference.float().norm().clamp_min(1e-30)).item()
+        }
+        
+    def _conv(self, job_data: Dict[str, Any]) -> torch.nn.Module:
+        """Feature extraction layer, shared by warm jobs since it only runs forward"""
+        return self._cached(job_data, ('conv2d', 3, 64, 3, torch.float32),
+                            lambda: self._init_weights(
+                                torch.nn.Conv2d(3, 64, kernel_size=3, padding=1).to(self.device)))
+        
+    def _image_layout(self, job_data: Dict[str, Any], images: torch.Tensor, conv: torch.nn.Module):
+        """Images and conv layer in the job's ``dtype`` and ``memory_format``
+        
+        The float32 contiguous originals are left as the reference. The layer
+        is converted on a copy (its weights are tiny) so shared cached modules
+        never change.
+        """
+        dtype = self._dtype(job_data)
+        memory_format = job_data.get('memory_format', 'contiguous')
+        if memory_format not in MEMORY_FORMATS:
+            raise ValueError(f"Unsupported memory_format {memory_format!r}, expected one of {', '.join(MEMORY_FORMATS)}")
+        if dtype == torch.float32 and memory_format == 'contiguous':
+            return images, conv
+            
+        layout = torch.channels_last if memory_format == 'channels_last' else torch.contiguous_format
+        return (images.to(dtype=dtype, memory_format=layout),
+                copy.deepcopy(conv).to(dtype=dtype, memory_format=layout))
+                
+    def _output_buffer(self, job_data: Dict[str, Any], name: str, *shape: int,
+                       dtype: torch.dtype = torch.float32) -> Optional[torch.Tensor]:
+        """Preallocated ``out=`` tensor, or None to let each op allocate its result
+        
+        Jobs choose with ``preallocate`` (default EXECUTOR_PREALLOCATE).
+        """
+        if not job_data.get('preallocate', self.preallocate):
+            return None
+        buffer, _ = self._checkout(job_data, ('empty', name, shape, dtype),
+                                   lambda: torch.empty(*shape, device=self.device, dtype=dtype))
+        return buffer
+        
+    def _allocated_bytes(self) -> int:
+        """Bytes allocated on the GPU so far (cumulative)"""
+        if not self.use_gpu:
+            return 0
+        return torch.cuda.memory_stats(self.device).get('allocated_bytes.all.allocated', 0)
+        
+    def _timed_allocations(self, before: int, iterations: int, step: Callable[[], Any]) -> Dict[str, int]:
+        """Result fields for the bytes allocated by a timed loop of ``iterations`` calls to step
+        
+        On GPU ``allocated_bytes`` is the caching allocator's counter since
+        ``before`` (it also sees concurrent slots on the same device). CPU has
+        no such counter, so one extra untimed step is profiled and scaled,
+        reported as ``allocated_bytes_estimated``. Empty unless TRACK_ALLOCATIONS is set.
+        """
+        if not self.track_allocations:
+            return {}
+        if self.use_gpu:
+            return {'allocated_bytes': self._allocated_bytes() - before}
+            
+        with self._profiler_lock, self._timer().phase('allocation_profile'):
+            with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU],
+                                        profile_memory=True) as prof:
+                with torch.inference_mode():
+                    step()
+        step_bytes = sum(event.self_cpu_memory_usage for event in prof.events()
+                         if event.self_cpu_memory_usage > 0)
+        return {'allocated_bytes_estimated': iterations * step_bytes}
+        
+    def _with_cache_usage(self, job_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Add this thread's cache hits and misses for the job to its result"""
+        usage = self._cache_usage.__dict__
+        result.update({
+            'cold_run': not self._warm(job_data),
+            'tensor_cache_hits': usage.get('hits', 0),
+            'tensor_cache_misses': usage.get('misses', 0)
+        })
+        return result
+        
+    def _timer(self) -> JobTimer:
+        """Timer of the job on this thread (a throwaway one outside execute)"""
+        timer = self._current_job.__dict__.get('timer')
+        return timer if timer is not None else JobTimer()
+        
+    def _start_timing(self) -> JobTimer:
+        """New timer for the job starting on this thread, with the host memory peak reset"""
+        reset_peak_rss()
+        self._current_job.timer = JobTimer()
+        return self._current_job.timer
+        
+    def _with_timings(self, timer: JobTimer, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the executor-side timings to a result, next to any the handler recorded"""
+        timings = timer.as_dict()
+        timings['host_memory_peak_bytes'] = peak_rss()
+        result['timings'] = {**timings, **result.get('timings', {})}
+        return result
+        
+    def _synchronize(self):
+        """Wait for the work queued on this thread's stream, so it can be timed"""
+        if self.use_gpu:
+            torch.cuda.current_stream().synchronize()
+            
+    def _check_interrupt(self):
+        """Raise JobCancelled/JobTimedOut if the job on this thread must stop"""
+        token = self._current_job.__dict__.get('token')
+        if token is not None:
+            token.check()
+            
+    def _progress_due(self) -> bool:
+        """True if the job on this thread should report progress now (rate limited)"""
+        if self.progress_sink is None or self.progress_interval <= 0:
+            return False
+        last = self._current_job.__dict__.get('progress_at')
+        now = time.monotonic()
+        if last is None or now - last < self.progress_interval:
+            return False
+        self._current_job.progress_at = now
+        return True
+        
+    def _emit_progress(self, job_data: Dict[str, Any], done: int, total: int, start_time: float, **fields):
+        """Send a progress event with throughput and ETA so far (start_time from time.perf_counter)"""
+        elapsed = time.perf_counter() - start_time
+        fraction = done / total
+        event = {
+            'job_id': job_data.get('job_id', 'unknown'),
+            'job_type': job_data.get('job_type'),
+            'done': done,
+            'total': total,
+            'progress': fraction,
+            'elapsed': elapsed,
+            'throughput': done / elapsed if elapsed > 0 else None,
+            'eta_s': elapsed * (1 - fraction) / fraction,
+            'timestamp': datetime.now().isoformat(),
+            **fields
+        }
+        try:
+            self.progress_sink(event)
+        except Exception as e:
+            print(f"⚠️  Could not report progress: {e}")
+            
+    def _evicting_on_oom(self, run: Callable[[], Any]) -> Any:
+        """Call run, emptying the tensor cache and retrying once if the GPU runs out of memory"""
+        try:
+            return run()
+        except torch.cuda.OutOfMemoryError:
+            if not self.tensor_cache.stats()['entries']:
+                raise
+            print("⚠️  Out of GPU memory: evicting the tensor cache and retrying")
+            # Values this attempt checked out are dropped rather than returned
+            self._cache_usage.__dict__.clear()
+            self.tensor_cache.evict()
+            torch.cuda.empty_cache()
+            return run()
+            
+    def execute(self, job_data: Dict[str, Any], token: CancelToken = None) -> Dict[str, Any]:
+        """Execute a job with its type's handler, checking token and reporting progress between iterations"""
+        job_type = get_job_type(job_data.get('job_type'))
+        self._current_job.token = token
+        self._current_job.progress_at = time.monotonic()
+        timer = self._start_timing()
+        self._cache_usage.__dict__.clear()
+        
+        def run():
+            # Seeded jobs generate the same data every run, so their results can be cached;
+            # each gets its own generator so concurrent slots cannot reseed one another
+            if job_data.get('seed') is not None:
+                self._current_job.generator = torch.Generator(device=self.device).manual_seed(job_data['seed'])
+            return job_type.run(self, job_data)
+            
+        try:
+            result = self._evicting_on_oom(run)
+        finally:
+            self._checkin_all()
+            self._current_job.token = None
+            self._current_job.progress_at = None
+            self._current_job.timer = None
+            self._current_job.generator = None
+        return self._with_timings(timer, self._with_cache_usage(job_data, result))
+            
+    def execute_batch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Execute jobs with the same batch key (see coalescer.batch_key) in one run"""
+        job_type = get_job_type(jobs[0].get('job_type'))
+        self._cache_usage.__dict__.clear()
+        timer = self._start_timing()
+        
+        try:
+            results = self._evicting_on_oom(lambda: job_type.run_batch(self, jobs))
+        finally:
+            self._checkin_all()
+            self._current_job.timer = None
+        return [self._with_timings(timer, self._with_cache_usage(job_data, result))
+                for job_data, result in zip(jobs, results)]
     
     def matrix_multiply(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """Matrix multiplication benchmark"""
         size = job_data.get('size', 1000)
         iterations = job_data.get('iterations', 10)
+        dtype = self._dtype(job_data)
+        timer = self._timer()
+        
+        with timer.phase('input_setup'):
+            # Use supplied matrices if the job references them, random ones otherwise
+            a_reference = self._input_tensor(job_data, 'a')
+            b_reference = self._input_tensor(job_data, 'b')
+            if a_reference is None or b_reference is None:
+                a_reference = self._randn(job_data, 'a', size, size)
+                b_reference = self._randn(job_data, 'b', size, size)
+            elif a_reference.dim() != 2 or b_reference.dim() != 2 or a_reference.shape[1] != b_reference.shape[0]:
+                raise ValueError(f"Cannot multiply inputs of shape {list(a_reference.shape)} "
+                                 f"and {list(b_reference.shape)}")
+            else:
+                size = a_reference.shape[0]
+            a, b = a_reference.to(dtype), b_reference.to(dtype)
+            out = self._output_buffer(job_data, 'c', a.shape[0], b.shape[1], dtype=dtype)
+            self._synchronize()
+            
+        print(f"Running matrix multiplication: {list(a.shape)}x{list(b.shape)} {dtype}, {iterations} iterations")
         
-        print(f"Running matrix multiplication: {size}x{size}, {iterations} iterations")
-        
-        # Create random matrices
-        a = torch.randn(size, size, device=self.device)
-        b = torch.randn(size, size, device=self.device)
-        
-        # Warm-up
-        if self.use_gpu:
-            torch.cuda.synchronize()
-            _ = torch.matmul(a, b)
-            torch.cuda.synchronize()
-        
-        # Benchmark
-        start_time = time.time()
-        
-        for _ in range(iterations):
-            c = torch.matmul(a, b)
-            if self.use_gpu:
-                torch.cuda.synchronize()
-        
-        elapsed = time.time() - start_time
+        with torch.inference_mode():
+            # Warm-up on every device: the first call pays for kernel selection and lazy allocations
+            with timer.phase('warmup'), self._precision_support(dtype):
+                _ = torch.matmul(a, b, out=out)
+                self._synchronize()
+            
+            # Benchmark
+            allocated_before = self._allocated_bytes()
+            start_time = time.perf_counter()
+            
+            for iteration in range(iterations):
+                self._check_interrupt()
+                started = time.perf_counter_ns()
+                c = torch.matmul(a, b, out=out)
+                self._synchronize()
+                timer.record_iteration(started)
+                if self._progress_due():
+                    self._emit_progress(job_data, iteration + 1, iterations, start_time)
+            
+            elapsed = time.perf_counter() - start_time
+            allocated = self._timed_allocations(allocated_before, iterations, lambda: torch.matmul(a, b, out=out))
+            
+            with timer.phase('reference'):
+                error = (self._numerical_error(torch.matmul(a_reference, b_reference), c)
+                         if dtype != torch.float32 else None)
         avg_time = elapsed / iterations
         
         result = {
             'job_type': 'matrix_multiply',
             'size': size,
             'iterations': iterations,
+            'dtype': str(dtype).replace('torch.', ''),
             'total_time': elapsed,
             'avg_time_per_iteration': avg_time,
             'device': str(self.device),
             'result_shape': list(c.shape),
-            'gflops': (2 * size ** 3 * iterations) / (elapsed * 1e9)
+            'gflops': (2 * a.shape[0] * a.shape[1] * b.shape[1] * iterations) / (elapsed * 1e9),
+            'preallocated': out is not None,
+            **allocated,
+            'numerical_error': error
         }
         
+        with timer.phase('output'):
+            stored = self._store_output(job_data, c)
+        if stored:
+            result['outputs'] = {'c': stored}
+        
         print(f"✓ Completed in {elapsed:.4f}s (avg: {avg_time:.4f}s)")
         return result
     
+    def matrix_multiply_batch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Same-size matrix multiplications as a single batched matmul"""
+        size = jobs[0].get('size', 1000)
+        iterations = jobs[0].get('iterations', 10)
+        dtype = self._dtype(jobs[0])
+        count = len(jobs)
+        
+        print(f"Running batched matrix multiplication: {count}x[{size}x{size}] {dtype}, {iterations} iterations")
+        
+        timer = self._timer()
+        with timer.phase('input_setup'):
+            a_reference = self._randn(jobs[0], 'a', count, size, size)
+            b_reference = self._randn(jobs[0], 'b', count, size, size)
+            a, b = a_reference.to(dtype), b_reference.to(dtype)
+            out = self._output_buffer(jobs[0], 'c', count, size, size, dtype=dtype)
+            self._synchronize()
+        
+        with torch.inference_mode():
+            with timer.phase('warmup'), self._precision_support(dtype):
+                _ = torch.bmm(a, b, out=out)
+                self._synchronize()
+                
+            allocated_before = self._allocated_bytes()
+            start_time = time.perf_counter()
+            
+            for _ in range(iterations):
+                started = time.perf_counter_ns()
+                c = torch.bmm(a, b, out=out)
+                self._synchronize()
+                timer.record_iteration(started)
+                    
+            elapsed = time.perf_counter() - start_time
+            allocated = self._timed_allocations(allocated_before, iterations, lambda: torch.bmm(a, b, out=out))
+            
+            with timer.phase('reference'):
+                reference = torch.bmm(a_reference, b_reference) if dtype != torch.float32 else None
+        
+        results = []
+        for index, job_data in enumerate(jobs):
+            result = {
+                'job_type': 'matrix_multiply',
+                'size': size,
+                'iterations': iterations,
+                'dtype': str(dtype).replace('torch.', ''),
+                'total_time': elapsed,
+                'avg_time_per_iteration': elapsed / iterations,
+                'device': str(self.device),
+                'result_shape': [size, size],
+                'gflops': (2 * size ** 3 * iterations * count) / (elapsed * 1e9),
+                'preallocated': out is not None,
+                **allocated,
+                'numerical_error': self._numerical_error(reference[index], c[index]) if reference is not None else None,
+                'coalesced': count
+            }
+            with timer.phase('output'):
+                stored = self._store_output(job_data, c[index])
+            if stored:
+                result['outputs'] = {'c': stored}
+            results.append(result)
+            
+        print(f"✓ Completed {count} jobs in {elapsed:.4f}s")
+        return results
+    
     def neural_network_training(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """Simple neural network training"""
         batch_size = job_data.get('batch_size', 64)
@@ -83,78 +505,180 @@ class JobExecutor:
         hidden_size = job_data.get('hidden_size', 256)
         output_size = job_data.get('output_size', 10)
         epochs = job_data.get('epochs', 5)
-        
-        print(f"Training neural network: {epochs} epochs")
-        
-        # Simple 2-layer network
-        model = torch.nn.Sequential(
-            torch.nn.Linear(input_size, hidden_size),
-            torch.nn.ReLU(),
-            torch.nn.Linear(hidden_size, output_size)
-        ).to(self.device)
-        
-        optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+        dtype = self._dtype(job_data)
+        
+        # Autocast keeps float32 weights and runs eligible ops in dtype (or the
+        # device's usual half type when none was asked for); otherwise the
+        # weights, gradients and optimizer state are all in dtype
+        use_autocast = bool(job_data.get('autocast', False))
+        if use_autocast and dtype == torch.float32:
+            dtype = torch.float16 if self.use_gpu else torch.bfloat16
+        weight_dtype = torch.float32 if use_autocast else dtype
+        
+        print(f"Training neural network: {epochs} epochs, {dtype}{' autocast' if use_autocast else ''}")
+        
+        timer = self._timer()
+        with timer.phase('input_setup'):
+            # Dummy data
+            samples = batch_size * 100
+            X_reference = self._randn(job_data, 'X', samples, input_size)
+            X = X_reference.to(weight_dtype)
+            y = self._cached(job_data, ('randint', 'y', output_size, samples),
+                             lambda: torch.randint(0, output_size, (samples,), device=self.device,
+                                                   generator=self._generator()))
+                             
+            # Simple 2-layer network; training mutates it, so warm jobs check it out
+            (model, optimizer, initial_state), hit = self._checkout(
+                job_data, ('mlp_adam', input_size, hidden_size, output_size, weight_dtype),
+                lambda: self._mlp(input_size, hidden_size, output_size, weight_dtype))
+            if hit:
+                self._reset_mlp(model, optimizer, initial_state)
+            self._synchronize()
+            
         criterion = torch.nn.CrossEntropyLoss()
-        
-        # Dummy data
-        X = torch.randn(batch_size * 100, input_size, device=self.device)
-        y = torch.randint(0, output_size, (batch_size * 100,), device=self.device)
-        
-        start_time = time.time()
+        autocast = functools.partial(torch.autocast, self.device.type, dtype=dtype, enabled=use_autocast)
+        # float16 gradients underflow without loss scaling; bfloat16 has float32's range
+        scaler = self._grad_scaler(use_autocast and dtype == torch.float16)
+        
+        # Warm-up with a forward pass only, so the weights still start untrained
+        with timer.phase('warmup'), self._precision_support(dtype):
+            with torch.no_grad(), autocast():
+                criterion(model(X[:batch_size]), y[:batch_size])
+            self._synchronize()
+            
+        steps = epochs * ((len(X) + batch_size - 1) // batch_size)
+        step = 0
+        start_time = time.perf_counter()
         
         for epoch in range(epochs):
             for i in range(0, len(X), batch_size):
+                self._check_interrupt()
+                started = time.perf_counter_ns()
                 batch_X = X[i:i+batch_size]
                 batch_y = y[i:i+batch_size]
                 
                 optimizer.zero_grad()
-                outputs = model(batch_X)
-                loss = criterion(outputs, batch_y)
-                loss.backward()
-                optimizer.step()
-        
-        if self.use_gpu:
-            torch.cuda.synchronize()
+                with autocast():
+                    outputs = model(batch_X)
+                    loss = criterion(outputs, batch_y)
+                scaler.scale(loss).backward()
+                scaler.step(optimizer)
+                scaler.update()
+                self._synchronize()
+                timer.record_iteration(started)
+                
+                step += 1
+                if self._progress_due():
+                    self._emit_progress(job_data, step, steps, start_time,
+                                        epoch=epoch + 1, epochs=epochs, loss=loss.item())
             
-        elapsed = time.time() - start_time
-        
+        elapsed = time.perf_counter() - start_time
+        
+        # Error of the trained model's forward pass against float32 evaluation of the same weights
+        error = None
+        if dtype != torch.float32:
+            with timer.phase('reference'), torch.no_grad():
+                probe = X_reference[:batch_size]
+                with autocast():
+                    value = model(probe.to(weight_dtype))
+                reference_model = model if weight_dtype == torch.float32 else copy.deepcopy(model).float()
+                error = self._numerical_error(reference_model(probe), value)
+                
         result = {
             'job_type': 'neural_network',
             'epochs': epochs,
             'batch_size': batch_size,
+            'dtype': str(dtype).replace('torch.', ''),
+            'autocast': use_autocast,
             'training_time': elapsed,
             'device': str(self.device),
-            'final_loss': loss.item()
+            'final_loss': loss.item(),
+            'numerical_error': error
         }
         
         print(f"✓ Training completed in {elapsed:.4f}s")
         return result
     
+    def _mlp(self, input_size: int, hidden_size: int, output_size: int, dtype: torch.dtype = torch.float32):
+        """New training model and optimizer, with the initial weights kept for resets"""
+        model = self._init_weights(torch.nn.Sequential(
+            torch.nn.Linear(input_size, hidden_size),
+            torch.nn.ReLU(),
+            torch.nn.Linear(hidden_size, output_size)
+        ).to(self.device)).to(dtype)
+        optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
+        initial_state = {name: tensor.clone() for name, tensor in model.state_dict().items()}
+        return model, optimizer, initial_state
+        
+    @staticmethod
+    def _reset_mlp(model: torch.nn.Module, optimizer: torch.optim.Optimizer, initial_state: Dict[str, torch.Tensor]):
+        """Put a reused model and optimizer back to their untrained state in place"""
+        with torch.no_grad():
+            model.load_state_dict(initial_state)
+        for state in optimizer.state.values():
+            for name, value in state.items():
+                if isinstance(value, torch.Tensor):
+                    value.zero_()
+                else:
+                    state[name] = 0
+                    
+    def _grad_scaler(self, enabled: bool):
+        """Loss scaler for float16 autocast training (a pass-through when disabled)"""
+        if hasattr(torch.amp, 'GradScaler'):
+            return torch.amp.GradScaler(self.device.type, enabled=enabled)
+        # torch < 2.3 only scales on CUDA
+        return torch.cuda.amp.GradScaler(enabled=enabled and self.use_gpu)
+        
     def vector_addition(self, job_data: Dict[str, Any]) -> Dict[str, Any]:
         """Simple vector addition benchmark"""
         size = job_data.get('size', 10000000)
         iterations = job_data.get('iterations', 100)
-        
-        print(f"Running vector addition: size={size}, iterations={iterations}")
-        
-        a = torch.randn(size, device=self.device)
-        b = torch.randn(size, device=self.device)
-        
-        start_time = time.time()
-        
-        for _ in range(iterations):
-            c = a + b
-            if self.use_gpu:
-                torch.cuda.synchronize()
-        
-        elapsed = time.time() - start_time
+        dtype = self._dtype(job_data)
+        
+        print(f"Running vector addition: size={size}, {dtype}, iterations={iterations}")
+        
+        timer = self._timer()
+        with timer.phase('input_setup'):
+            a_reference = self._randn(job_data, 'a', size)
+            b_reference = self._randn(job_data, 'b', size)
+            a, b = a_reference.to(dtype), b_reference.to(dtype)
+            out = self._output_buffer(job_data, 'c', size, dtype=dtype)
+            self._synchronize()
+        
+        with torch.inference_mode():
+            with timer.phase('warmup'), self._precision_support(dtype):
+                _ = torch.add(a, b, out=out)
+                self._synchronize()
+                
+            allocated_before = self._allocated_bytes()
+            start_time = time.perf_counter()
+            
+            for iteration in range(iterations):
+                self._check_interrupt()
+                started = time.perf_counter_ns()
+                c = torch.add(a, b, out=out)
+                self._synchronize()
+                timer.record_iteration(started)
+                if self._progress_due():
+                    self._emit_progress(job_data, iteration + 1, iterations, start_time)
+            
+            elapsed = time.perf_counter() - start_time
+            allocated = self._timed_allocations(allocated_before, iterations, lambda: torch.add(a, b, out=out))
+            
+            with timer.phase('reference'):
+                error = (self._numerical_error(torch.add(a_reference, b_reference), c)
+                         if dtype != torch.float32 else None)
         
         result = {
             'job_type': 'vector_add',
             'size': size,
             'iterations': iterations,
+            'dtype': str(dtype).replace('torch.', ''),
             'total_time': elapsed,
-            'device': str(self.device)
+            'device': str(self.device),
+            'preallocated': out is not None,
+            **allocated,
+            'numerical_error': error
         }
         
         print(f"✓ Completed in {elapsed:.4f}s")
@@ -166,31 +690,128 @@ class JobExecutor:
         image_size = job_data.get('image_size', 224)
         iterations = job_data.get('iterations', 50)
         
-        print(f"Running image processing: {batch_size}x{image_size}x{image_size}")
-        
-        # Create dummy images (batch, channels, height, width)
-        images = torch.randn(batch_size, 3, image_size, image_size, device=self.device)
-        
-        # Simple conv layer
-        conv = torch.nn.Conv2d(3, 64, kernel_size=3, padding=1).to(self.device)
-        
-        start_time = time.time()
-        
-        for _ in range(iterations):
-            output = conv(images)
-            if self.use_gpu:
-                torch.cuda.synchronize()
+        timer = self._timer()
+        with timer.phase('input_setup'):
+            # Use supplied images (batch, channels, height, width) or dummy ones
+            images_reference = self._input_tensor(job_data, 'images')
+            if images_reference is None:
+                images_reference = self._randn(job_data, 'images', batch_size, 3, image_size, image_size)
+            elif images_reference.dim() != 4 or images_reference.shape[1] != 3:
+                raise ValueError(f"Expected images of shape [batch, 3, height, width], "
+                                 f"got {list(images_reference.shape)}")
+            else:
+                batch_size, image_size = images_reference.shape[0], images_reference.shape[2]
+                
+            # Simple conv layer
+            conv_reference = self._conv(job_data)
+            images, conv = self._image_layout(job_data, images_reference.float(), conv_reference)
+            self._synchronize()
+            
+        print(f"Running image processing: {batch_size}x{image_size}x{image_size} {images.dtype}")
         
-        elapsed = time.time() - start_time
+        # Convolutions have no out= variant; inference mode at least skips autograd bookkeeping
+        with torch.inference_mode():
+            with timer.phase('warmup'), self._precision_support(images.dtype):
+                _ = conv(images)
+                self._synchronize()
+                
+            allocated_before = self._allocated_bytes()
+            start_time = time.perf_counter()
+            
+            for iteration in range(iterations):
+                self._check_interrupt()
+                started = time.perf_counter_ns()
+                output = conv(images)
+                self._synchronize()
+                timer.record_iteration(started)
+                if self._progress_due():
+                    self._emit_progress(job_data, iteration + 1, iterations, start_time)
+            
+            elapsed = time.perf_counter() - start_time
+            allocated = self._timed_allocations(allocated_before, iterations, lambda: conv(images))
+            
+            with timer.phase('reference'):
+                error = (self._numerical_error(conv_reference(images_reference.float()), output)
+                         if conv is not conv_reference else None)
         
         result = {
             'job_type': 'image_processing',
             'batch_size': batch_size,
             'image_size': image_size,
             'iterations': iterations,
+            'dtype': str(images.dtype).replace('torch.', ''),
+            'memory_format': job_data.get('memory_format', 'contiguous'),
             'total_time': elapsed,
-            'device': str(self.device)
+            'device': str(self.device),
+            **allocated,
+            'numerical_error': error
         }
         
+        with timer.phase('output'):
+            stored = self._store_output(job_data, output)
+        if stored:
+            result['outputs'] = {'features': stored}
+            
         print(f"✓ Completed in {elapsed:.4f}s")
         return result
+        
+    def image_processing_batch(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Same-shape image jobs stacked into one convolution batch"""
+        batch_size = jobs[0].get('batch_size', 32)
+        image_size = jobs[0].get('image_size', 224)
+        iterations = jobs[0].get('iterations', 50)
+        count = len(jobs)
+        
+        print(f"Running batched image processing: {count}x{batch_size}x{image_size}x{image_size}")
+        
+        timer = self._timer()
+        with timer.phase('input_setup'):
+            images_reference = self._randn(jobs[0], 'images', count * batch_size, 3, image_size, image_size)
+            conv_reference = self._conv(jobs[0])
+            images, conv = self._image_layout(jobs[0], images_reference, conv_reference)
+            self._synchronize()
+        
+        with torch.inference_mode():
+            with timer.phase('warmup'), self._precision_support(images.dtype):
+                _ = conv(images)
+                self._synchronize()
+                
+            allocated_before = self._allocated_bytes()
+            start_time = time.perf_counter()
+            
+            for _ in range(iterations):
+                started = time.perf_counter_ns()
+                output = conv(images)
+                self._synchronize()
+                timer.record_iteration(started)
+                    
+            elapsed = time.perf_counter() - start_time
+            allocated = self._timed_allocations(allocated_before, iterations, lambda: conv(images))
+            
+            with timer.phase('reference'):
+                reference = conv_reference(images_reference) if conv is not conv_reference else None
+        
+        results = []
+        for index, job_data in enumerate(jobs):
+            rows = slice(index * batch_size, (index + 1) * batch_size)
+            result = {
+                'job_type': 'image_processing',
+                'batch_size': batch_size,
+                'image_size': image_size,
+                'iterations': iterations,
+                'dtype': str(images.dtype).replace('torch.', ''),
+                'memory_format': job_data.get('memory_format', 'contiguous'),
+                'total_time': elapsed,
+                'device': str(self.device),
+                **allocated,
+                'numerical_error': self._numerical_error(reference[rows], output[rows]) if reference is not None else None,
+                'coalesced': count
+            }
+            with timer.phase('output'):
+                stored = self._store_output(job_data, output[rows])
+            if stored:
+                result['outputs'] = {'features': stored}
+            results.append(result)
+            
+        print(f"✓ Completed {count} jobs in {elapsed:.4f}s")
+        return results
@@ -0,0 +1,123 @@
+"""
+Tensor Cache - Reuse input buffers and initialized modules across jobs of the same shape
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import torch
+
+
+def nbytes(value: Any) -> int:
+    """Memory held by a cached tensor, module, optimizer or tuple of them"""
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, torch.nn.Module):
+        return sum(nbytes(t) for t in list(value.parameters()) + list(value.buffers()))
+    if isinstance(value, torch.optim.Optimizer):
+        return sum(nbytes(t) for state in value.state.values() for t in state.values()
+                   if isinstance(t, torch.Tensor))
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(v) for v in value)
+    return 0
+
+
+class TensorCache:
+    """Memory-budgeted LRU of tensors and modules keyed by shape, dtype and device
+
+    ``get`` shares an entry between jobs, so it is only for values the job
+    reads (inputs, inference modules). Values a job mutates, like a model
+    being trained, are taken out with ``checkout`` and handed back with
+    ``checkin`` so concurrent slots never use the same one.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def get(self, key: Hashable, factory: Callable[[], Any]):
+        """Return (value, hit); a missing value is built with factory and cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], True
+            self.misses += 1
+
+        value = factory()
+        self._insert(key, value)
+        return value, False
+
+    def checkout(self, key: Hashable, factory: Callable[[], Any]):
+        """Remove and return (value, hit); the caller owns it until checkin"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+                self.hits += 1
+                return entry[0], True
+            self.misses += 1
+        return factory(), False
+
+    def checkin(self, key: Hashable, value: Any):
+        """Return a checked out value to the cache"""
+        self._insert(key, value)
+
+    def _insert(self, key: Hashable, value: Any):
+        """Store a value and evict least recently used entries over the budget"""
+        size = nbytes(value)
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.budget_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def evict(self, key: Hashable = None):
+        """Drop one entry, or every entry if no key is given"""
+        with self._lock:
+            if key is None:
+                self.evictions += len(self._entries)
+                self._entries.clear()
+                self._size = 0
+            else:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._size -= entry[1]
+                    self.evictions += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current usage"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'budget_bytes': self.budget_bytes
+            }
+
+
+def create_tensor_cache() -> TensorCache:
+    """Cache with a budget of TENSOR_CACHE_MB megabytes (0 disables it)"""
+    return TensorCache(int(float(os.getenv('TENSOR_CACHE_MB', '512')) * 1024 * 1024))
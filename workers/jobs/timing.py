@@ -0,0 +1,90 @@
+"""
+Timing - Phase and per-iteration timings of a job on the perf_counter_ns clock
+"""
+import math
+import re
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+def _ms(nanoseconds: float) -> float:
+    return round(nanoseconds / 1e6, 4)
+
+
+class JobTimer:
+    """Nanosecond durations of a job's phases and of each timed iteration
+
+    A phase entered more than once reports its total. Iterations are
+    recorded by the caller around the work alone, after synchronizing the
+    device, so the per-iteration statistics exclude interrupt checks and
+    progress reporting between them.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.iterations = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as (part of) a phase"""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter_ns() - start
+
+    def record_iteration(self, started_ns: int):
+        """Record an iteration that began at ``started_ns`` and just ended"""
+        self.iterations.append(time.perf_counter_ns() - started_ns)
+
+    def iteration_stats(self) -> Optional[Dict[str, Any]]:
+        """Count, min, median and p95 (nearest rank) of the iteration times in ms"""
+        if not self.iterations:
+            return None
+        samples = sorted(self.iterations)
+        count = len(samples)
+        middle = count // 2
+        median = samples[middle] if count % 2 else (samples[middle - 1] + samples[middle]) / 2
+        return {
+            'count': count,
+            'min_ms': _ms(samples[0]),
+            'median_ms': _ms(median),
+            'p95_ms': _ms(samples[math.ceil(0.95 * count) - 1]),
+            'max_ms': _ms(samples[-1])
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Phase totals as ``<phase>_ms`` plus the iteration statistics"""
+        timings = {f'{name}_ms': _ms(duration) for name, duration in self.phases.items()}
+        timings['iterations'] = self.iteration_stats()
+        return timings
+
+
+def reset_peak_rss():
+    """Restart the kernel's peak RSS counter for this process, where Linux allows it"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident memory of this process in bytes since the last reset
+
+    Falls back to getrusage's lifetime peak where /proc is not available.
+    The counter is per process, so thread slots sharing one see each
+    other's allocations.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            match = re.search(r'^VmHWM:\s+(\d+) kB', f.read(), re.MULTILINE)
+        if match:
+            return int(match.group(1)) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,69 @@
+"""
+Progress - Stream progress events of running jobs to the progress queue
+"""
+import queue
+import threading
+from typing import Dict, Any
+
+from broker.broker_client import BrokerConfig, create_broker
+
+
+class ProgressPublisher:
+    """Publishes executor progress events on its own connection from a background thread
+
+    ``emit`` never blocks the job: events wait in a bounded local buffer and
+    are dropped if the broker falls behind, since a newer event for the same
+    job supersedes them anyway.
+    """
+
+    def __init__(self, worker_id: str, worker_type: str, config: BrokerConfig = None, max_pending: int = 1000):
+        self.config = config or BrokerConfig()
+        self.worker_id = worker_id
+        self.worker_type = worker_type
+        self.broker = create_broker(self.config)
+        self.events_dropped = 0
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def emit(self, event: Dict[str, Any]):
+        """Queue an event for publishing"""
+        event.update({'worker_id': self.worker_id, 'worker_type': self.worker_type})
+        try:
+            self._pending.put_nowait(event)
+        except queue.Full:
+            self.events_dropped += 1
+
+    def start(self):
+        """Start publishing in the background"""
+        self._thread = threading.Thread(target=self._run, name='progress', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Publish loop; events buffered while a publish fails are dropped"""
+        while not self._stop.is_set():
+            try:
+                events = [self._pending.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(events) < 100:
+                try:
+                    events.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.broker.publish_many(events, self.config.progress_queue)
+            except Exception as e:
+                print(f"⚠️  Progress publish failed: {e}")
+                self.events_dropped += len(events)
+                try:
+                    self.broker.close()
+                except Exception:
+                    pass
+
+    def stop(self):
+        """Stop publishing and close the connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self.broker.close()
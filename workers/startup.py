@@ -0,0 +1,36 @@
+"""
+Startup - Cold-start phase timings of a worker process
+"""
+import time
+from typing import Dict
+
+import psutil
+
+
+class StartupTimer:
+    """Seconds from process creation to the end of each startup phase
+
+    The start comes from the OS, so interpreter start-up and the imports done
+    before the timer exists are included in the first phase.
+    """
+
+    def __init__(self):
+        try:
+            self.process_started = psutil.Process().create_time()
+        except psutil.Error:
+            self.process_started = time.time()
+        self.phases = {}
+
+    def mark(self, phase: str) -> float:
+        """Record that a phase just ended; returns seconds since process start"""
+        elapsed = round(time.time() - self.process_started, 4)
+        self.phases.setdefault(phase, elapsed)
+        return elapsed
+
+    def summary(self) -> str:
+        """One-line report of the phases recorded so far"""
+        return ', '.join(f"{phase} {elapsed:.2f}s" for phase, elapsed in self.phases.items())
+
+    def as_dict(self) -> Dict[str, float]:
+        """Copy of the phase timings"""
+        return dict(self.phases)
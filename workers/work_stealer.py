@@ -0,0 +1,95 @@
+"""
+Work Stealer - Let an idle worker take portable jobs from the other pool's queue
+"""
+import os
+import threading
+from typing import Dict, Any, Callable
+
+from broker.broker_client import BrokerConfig, create_broker
+from broker.job_messages import job_work
+
+
+class WorkStealer:
+    """Polls another worker queue while the owning worker sits idle
+
+    Only jobs that are portable are kept: not pinned with ``strict_device``,
+    of a type listed in STEAL_JOB_TYPES and at most STEAL_MAX_GFLOPS of work,
+    or explicitly submitted with ``portable: true``. Anything else is put back.
+    Stolen jobs run through the worker's own ``process_job`` on this thread,
+    one at a time, using a separate broker connection.
+    """
+
+    def __init__(self, victim_queue: str, process_job: Callable[[Dict[str, Any]], None],
+                 is_idle: Callable[[float], bool], config: BrokerConfig = None):
+        self.config = config or BrokerConfig()
+        self.victim_queue = victim_queue
+        self.process_job = process_job
+        self.is_idle = is_idle
+        self.enabled = os.getenv('WORK_STEALING', '0').lower() in ('1', 'true', 'yes')
+        self.idle_threshold = float(os.getenv('STEAL_IDLE_MS', '2000')) / 1000
+        self.poll_interval = float(os.getenv('STEAL_POLL_MS', '500')) / 1000
+        self.job_types = set(os.getenv('STEAL_JOB_TYPES', 'matrix_multiply,vector_add,image_processing').split(','))
+        self.max_work = float(os.getenv('STEAL_MAX_GFLOPS', '50')) * 1e9
+        self.jobs_stolen = 0
+        self.broker = create_broker(self.config)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_portable(self, job_data: Dict[str, Any]) -> bool:
+        """True if the job may run on either pool"""
+        if job_data.get('strict_device') or job_data.get('portable') is False:
+            return False
+        if job_data.get('portable'):
+            return True
+        return job_data.get('job_type') in self.job_types and job_work(job_data) <= self.max_work
+
+    def start(self):
+        """Start stealing in the background if WORK_STEALING is enabled"""
+        if not self.enabled:
+            return
+        self._thread = threading.Thread(target=self._run, name='work-stealer', daemon=True)
+        self._thread.start()
+        print(f"🦝 Work stealing from {self.victim_queue} after {self.idle_threshold:.1f}s idle")
+
+    def _run(self):
+        """Steal loop; broker failures are logged and retried on the next poll"""
+        while not self._stop.wait(self.poll_interval):
+            if not self.is_idle(self.idle_threshold):
+                continue
+            try:
+                self._steal_one()
+            except Exception as e:
+                print(f"⚠️  Work stealing failed: {e}")
+                try:
+                    self.broker.close()
+                except Exception:
+                    pass
+
+    def _steal_one(self):
+        """Take the head of the victim queue if it is portable, else put it back"""
+        fetched = self.broker.get_message(self.victim_queue)
+        if fetched is None:
+            return
+
+        delivery_tag, message, headers = fetched
+        if not self.is_portable(message):
+            self.broker.nack(self.victim_queue, delivery_tag, requeue=True)
+            # The head stays there until its own pool takes it; don't spin on it
+            self._stop.wait(self.idle_threshold)
+            return
+
+        message['stolen_from'] = self.victim_queue
+        error = None
+        try:
+            self.process_job(message)
+            self.jobs_stolen += 1
+        except Exception as e:
+            error = e
+        self.broker.settle(self.victim_queue, delivery_tag, message, headers, error)
+
+    def stop(self):
+        """Stop stealing and close the connection"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+        self.broker.close()
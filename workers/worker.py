@@ -0,0 +1,377 @@
+"""
+Worker - Executes jobs from the GPU or CPU worker queue on N execution slots
+"""
+import sys
+import os
+import signal
+import time
+import uuid
+import threading
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broker.base import DECODE_TIME_FIELD, RequeueMessage
+from broker.broker_client import BrokerConfig, create_broker
+from broker.cancellation import CancellationListener, CancelToken, JobCancelled, JobInterrupted
+from broker.job_messages import is_expired, expired_result, interrupted_result, job_work, queue_wait
+from broker.result_cache import cache_key, create_result_cache, is_cacheable
+from workers.heartbeat import HeartbeatPublisher, ThroughputMeter, free_memory
+from workers.jobs.coalescer import JobCoalescer
+from workers.progress import ProgressPublisher
+from workers.startup import StartupTimer
+from workers.work_stealer import WorkStealer
+
+
+class Worker:
+    """Worker that processes jobs from one pool's queue on a CPU or GPU
+    
+    A single consumer feeds ``slots`` concurrent execution slots: threads with
+    their own CUDA stream on GPU, executor processes on a multi-slot CPU
+    worker. Up to WORKER_QUEUE_SIZE further jobs wait locally (prefetched but
+    not started), and acks are released in delivery order.
+    
+    SIGTERM drains the worker: it stops taking jobs, gives running ones
+    DRAIN_GRACE_S to finish and requeues the rest, so restarts lose no work.
+    READY_FILE exists while the worker is consuming (readiness probe).
+    
+    torch, the executor and the engine are loaded after the worker has
+    connected and is consuming (WORKER_PRELOAD=background, the default), on
+    the first job (lazy) or before consuming (eager), so a new worker is
+    taking jobs before its heavy imports finish.
+    """
+    
+    def __init__(self, device: str = 'cpu', worker_id: str = None, slots: int = None):
+        if device not in ('cpu', 'gpu'):
+            raise ValueError(f"Unknown worker device: {device}")
+            
+        self.startup = StartupTimer()
+        self.startup.mark('imports')
+        config = BrokerConfig()
+        self.worker_type = device
+        self.worker_id = worker_id or os.getenv('WORKER_ID', f'{device}-worker-{uuid.uuid4().hex[:8]}')
+        self.queue = config.gpu_queue if device == 'gpu' else config.cpu_queue
+        self.broker = create_broker(config)
+        self.broker.record_decode_time = True
+        self.slots = slots or int(os.getenv('WORKER_SLOTS', os.getenv('WORKER_CONCURRENCY', '1')))
+        self.queue_size = int(os.getenv('WORKER_QUEUE_SIZE', '1'))
+        self.ordered_acks = os.getenv('WORKER_ORDERED_ACKS', '1').lower() in ('1', 'true', 'yes')
+        self.progress = ProgressPublisher(self.worker_id, self.worker_type, config)
+        self.preload = os.getenv('WORKER_PRELOAD', 'background').lower()
+        self.executor = None
+        self.engine = None
+        self._engine_lock = threading.Lock()
+        self.jobs_processed = 0
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.throughput = ThroughputMeter()
+        self._runtime_samples = []
+        self.heartbeat = HeartbeatPublisher(self.heartbeat_payload)
+        self.coalescer = JobCoalescer(self._execute, self._execute_batch, slots=self.slots)
+        self.result_cache = create_result_cache()
+        self._last_active = time.monotonic()
+        other_queue = config.cpu_queue if device == 'gpu' else config.gpu_queue
+        self.stealer = WorkStealer(other_queue, self.process_job, self.is_idle)
+        self.cancellations = CancellationListener(config)
+        self.jobs_interrupted = 0
+        self.jobs_preempted = 0
+        self._tokens = {}
+        self.drain_grace = float(os.getenv('DRAIN_GRACE_S', '25'))
+        self.ready_file = os.getenv('READY_FILE', '/tmp/worker-ready')
+        self.draining = threading.Event()
+        
+        print(f"🚀 {self.worker_type.upper()} Worker initialized: {self.worker_id}")
+        print(f"   Slots: {self.slots}, local queue: {self.queue_size}, preload: {self.preload}")
+        
+    def _load_engine(self):
+        """Import torch, create the executor and start the engine, once"""
+        with self._engine_lock:
+            if self.engine is None:
+                # The heavy imports live here so the worker connects without them
+                from workers.engines import create_engine
+                from workers.jobs.job_executor import JobExecutor
+                
+                self.executor = JobExecutor(use_gpu=self.worker_type == 'gpu')
+                engine = create_engine(self.executor, self.slots, self.progress.emit)
+                engine.warm()
+                self.engine = engine
+                self.startup.mark('engine_loaded')
+                print(f"⚙️  Engine loaded: {type(engine).__name__} on {self.executor.device}")
+                print(f"⏱️  Cold start: {self.startup.summary()}")
+        return self.engine
+        
+    def _preload_engine(self):
+        """Load the engine in the background, logging failures (jobs retry the load)"""
+        try:
+            self._load_engine()
+        except Exception as e:
+            print(f"⚠️  Engine preload failed: {e}")
+            
+    def _execute(self, job_data: dict, token: CancelToken = None) -> dict:
+        """Run one job on the engine, loading it first if needed"""
+        return self._load_engine().execute(job_data, token)
+        
+    def _execute_batch(self, jobs: list) -> list:
+        """Run a coalesced batch on the engine, loading it first if needed"""
+        return self._load_engine().execute_batch(jobs)
+        
+    def heartbeat_payload(self) -> dict:
+        """Current load reported to the scheduler"""
+        device = self.executor.device if self.executor else None
+        with self._stats_lock:
+            return {
+                'worker_id': self.worker_id,
+                'worker_type': self.worker_type,
+                'device': str(device) if device else None,
+                'in_flight': self.in_flight,
+                'slots': self.slots,
+                'jobs_processed': self.jobs_processed,
+                'throughput': self.throughput.rate(),
+                'free_memory': free_memory(device) if device else None,
+                'draining': self.draining.is_set(),
+                'cold_start': self.startup.as_dict(),
+                'tensor_cache': self.engine.cache_stats() if self.engine else None,
+                'samples': self._drain_samples()
+            }
+            
+    def _drain_samples(self) -> list:
+        """Runtimes completed since the last heartbeat (caller holds _stats_lock)"""
+        samples, self._runtime_samples = self._runtime_samples, []
+        return samples
+        
+    def is_idle(self, threshold: float) -> bool:
+        """True if no job has run for at least threshold seconds"""
+        with self._stats_lock:
+            return self.in_flight == 0 and time.monotonic() - self._last_active >= threshold
+            
+    def process_job(self, job_data: dict):
+        """Process a single job, tracking it as in flight for heartbeats"""
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            self._process_job(job_data)
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+                self._last_active = time.monotonic()
+                
+    def _process_job(self, job_data: dict):
+        """Process a single job"""
+        # Worker-side phases; the executor adds its own under the same 'timings' key
+        waited = queue_wait(job_data)
+        decode_ms = job_data.pop(DECODE_TIME_FIELD, None)
+        timings = {
+            'queue_wait_ms': round(waited * 1000, 4) if waited is not None else None,
+            'deserialize_ms': round(decode_ms, 4) if decode_ms is not None else None
+        }
+        
+        job_id = job_data.get('job_id', 'unknown')
+        print(f"\n{'='*60}")
+        print(f"📥 Processing job {job_id}")
+        print(f"   Type: {job_data.get('job_type')}")
+        print(f"   Worker: {self.worker_id}")
+        print(f"{'='*60}")
+        
+        started_at = datetime.now()
+        start_time = time.perf_counter()
+        
+        # Cancelled through the cancellation channel or after timeout_s of execution
+        token = CancelToken(job_data.get('timeout_s'))
+        self.cancellations.watch(job_id, token)
+        with self._stats_lock:
+            self._tokens[job_id] = token
+            
+        # Drain started after this job was handed over: put it straight back
+        if self.draining.is_set():
+            token.preempt()
+        
+        try:
+            if is_expired(job_data):
+                # Stale job: report it instead of spending worker time on it
+                print(f"⌛ Job {job_id} expired before execution")
+                result = expired_result(job_data, self.worker_id, self.worker_type)
+            elif token.cancelled:
+                raise JobCancelled("Job was cancelled before it started")
+            else:
+                # Execute the job, batched with compatible ones if coalescing is on
+                result = self.coalescer.run(job_data, token)
+                
+                # Add metadata
+                result.update({
+                    'job_id': job_id,
+                    'worker_id': self.worker_id,
+                    'worker_type': self.worker_type,
+                    'status': 'completed',
+                    'priority': job_data.get('priority'),
+                    'stolen': 'stolen_from' in job_data,
+                    'submit_time': job_data.get('submit_time'),
+                    'start_time': started_at.isoformat(),
+                    'end_time': datetime.now().isoformat(),
+                    'processing_time': time.perf_counter() - start_time
+                })
+                
+        except JobInterrupted as e:
+            if token.preempted:
+                print(f"↩️  Job {job_id} preempted by shutdown, returning it to the queue")
+                with self._stats_lock:
+                    self.jobs_preempted += 1
+                raise RequeueMessage(f"Job {job_id} preempted by worker shutdown") from e
+                
+            print(f"🛑 Job {job_id} {e.status.replace('_', ' ')}: {e}")
+            result = interrupted_result(job_data, self.worker_id, self.worker_type, e.status, str(e),
+                                       time.perf_counter() - start_time, started_at.isoformat())
+            with self._stats_lock:
+                self.jobs_interrupted += 1
+                
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {str(e)}")
+            
+            # Send error result
+            result = {
+                'job_id': job_id,
+                'worker_id': self.worker_id,
+                'worker_type': self.worker_type,
+                'status': 'failed',
+                'error': str(e),
+                'processing_time': time.perf_counter() - start_time
+            }
+            
+        finally:
+            self.cancellations.unwatch(job_id)
+            with self._stats_lock:
+                self._tokens.pop(job_id, None)
+                
+        result['timings'] = {**timings, **result.get('timings', {}),
+                             'processing_ms': round(result['processing_time'] * 1000, 4)}
+            
+        if result['status'] == 'completed' and self.result_cache and is_cacheable(job_data):
+            try:
+                self.result_cache.put(cache_key(job_data, self.worker_type), result)
+            except Exception as e:
+                print(f"⚠️  Could not cache result of job {job_id}: {e}")
+                
+        # Send result back; raising leaves the job unacked so it is redelivered.
+        # The publish can't be timed inside the result it sends, so it goes to the heartbeat
+        publish_start = time.perf_counter()
+        if not self.broker.publish_result(result):
+            raise RuntimeError(f"Result for job {job_id} was not confirmed by the broker")
+        publish_ms = (time.perf_counter() - publish_start) * 1000
+            
+        if result['status'] == 'completed':
+            self.startup.mark('first_job')
+            with self._stats_lock:
+                self.jobs_processed += 1
+                self._runtime_samples.append({
+                    'job_type': result.get('job_type'),
+                    'work': job_work(job_data),
+                    'runtime': result['processing_time'],
+                    'publish_ms': publish_ms
+                })
+            self.throughput.record()
+            print(f"✅ Job {job_id} completed successfully")
+            print(f"   Processing time: {result['processing_time']:.4f}s (result published in {publish_ms:.1f}ms)")
+            iterations = result['timings'].get('iterations')
+            if iterations:
+                print(f"   Iterations: min {iterations['min_ms']:.3f}ms, median {iterations['median_ms']:.3f}ms, "
+                      f"p95 {iterations['p95_ms']:.3f}ms")
+            print(f"   Total jobs processed: {self.jobs_processed}")
+            
+    def _set_ready(self, ready: bool):
+        """Create or remove the readiness file"""
+        if not self.ready_file:
+            return
+        try:
+            if ready:
+                with open(self.ready_file, 'w') as f:
+                    f.write(f"{self.worker_id} {datetime.now().isoformat()}\n")
+            elif os.path.exists(self.ready_file):
+                os.remove(self.ready_file)
+        except OSError as e:
+            print(f"⚠️  Could not update readiness file {self.ready_file}: {e}")
+            
+    def drain(self):
+        """Stop taking jobs, let running ones finish within the grace period, requeue the rest"""
+        if self.draining.is_set():
+            return
+        self.draining.set()
+        self._set_ready(False)
+        print(f"\n🚰 {self.worker_type.upper()} Worker {self.worker_id} draining "
+              f"({self.in_flight} jobs in flight, grace {self.drain_grace:.0f}s)...")
+              
+        # Stolen jobs run on the stealer's thread, so stop it before waiting
+        self.stealer.stop()
+        self.broker.stop_consuming()
+        
+        deadline = time.monotonic() + self.drain_grace
+        while time.monotonic() < deadline:
+            with self._stats_lock:
+                if not self._tokens:
+                    return
+            time.sleep(0.1)
+            
+        with self._stats_lock:
+            tokens = list(self._tokens.items())
+        for job_id, token in tokens:
+            print(f"⏱️  Job {job_id} still running after {self.drain_grace:.0f}s, preempting it")
+            token.preempt()
+            
+    def _on_sigterm(self, signum, frame):
+        """Drain on a separate thread; the main thread keeps servicing the consumer"""
+        threading.Thread(target=self.drain, name='drain', daemon=True).start()
+        
+    def start(self):
+        """Start consuming jobs from the queue"""
+        print(f"\n🎯 {self.worker_type.upper()} Worker {self.worker_id} is ready!")
+        print(f"⏳ Waiting for jobs...\n")
+        
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._on_sigterm)
+            
+        try:
+            self.broker.connect()
+            self.startup.mark('connected')
+            if self.preload == 'eager':
+                self._load_engine()
+            self.cancellations.start()
+            self.progress.start()
+            self.heartbeat.start()
+            self.stealer.start()
+            # Slot threads run callbacks so the connection keeps servicing
+            # heartbeats and prefetching the local queue while jobs execute
+            slots = self.slots
+            if self.coalescer.enabled:
+                # A batch needs its jobs delivered and waiting on threads together;
+                # the coalescer still lets only self.slots of them execute at once
+                slots = max(slots, self.coalescer.max_batch)
+            self._set_ready(True)
+            self.startup.mark('ready')
+            print(f"⏱️  Cold start: {self.startup.summary()}")
+            if self.preload == 'background':
+                threading.Thread(target=self._preload_engine, name='preload', daemon=True).start()
+            self.broker.consume(self.queue, self.process_job, prefetch=slots + self.queue_size,
+                                concurrency=slots, ordered=self.ordered_acks)
+        except KeyboardInterrupt:
+            print(f"\n👋 {self.worker_type.upper()} Worker {self.worker_id} shutting down...")
+            print(f"   Jobs processed: {self.jobs_processed}")
+            print(f"   Jobs stolen: {self.stealer.jobs_stolen}")
+            print(f"   Jobs cancelled or timed out: {self.jobs_interrupted}")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        finally:
+            self._set_ready(False)
+            if self.draining.is_set():
+                print(f"👋 {self.worker_type.upper()} Worker {self.worker_id} drained")
+                print(f"   Jobs processed: {self.jobs_processed}")
+                print(f"   Jobs requeued by shutdown: {self.jobs_preempted}")
+            self.stealer.stop()
+            self.heartbeat.stop()
+            if self.engine:
+                self.engine.close()
+            self.progress.stop()
+            self.broker.close()
+
+
+if __name__ == "__main__":
+    worker = Worker(os.getenv('WORKER_TYPE', 'cpu'))
+    worker.start()